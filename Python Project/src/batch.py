@@ -0,0 +1,176 @@
+"""
+Headless batch processing of a whole directory of signal files
+
+Reads every .dat/.csv/.sig file matched by the given directories or glob patterns, finds the
+strongest Fourier components (and optionally reconstructs and plots the series) using a
+pool of worker processes, and writes one consolidated table.
+
+    python batch.py ../data --num-terms 7 --workers 8 --output results.csv
+    python batch.py "../data/noisy_*.dat" --figures ../figures --output results.json
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from given.readers import read_signal
+from given.fft import FFT
+from given.metrics import Metrics, metrics
+
+EXTENSIONS = (".dat", ".csv", ".sig")
+
+
+def find_files(inputs):
+    """
+    Expand directories and glob patterns into a sorted list of signal files
+    """
+    file_paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        file_paths.update(path for path in glob.glob(pattern)
+                          if os.path.isfile(path) and path.endswith(EXTENSIONS))
+    return sorted(file_paths)
+
+
+def save_plot(file_path, time, signal, fourier_series, figure_folder):
+    """
+    Save the signal and its Fourier series as a png, without needing a display
+    """
+    from matplotlib.figure import Figure  # only workers that plot pay for matplotlib
+
+    fig = Figure()
+    plot1 = fig.add_subplot(111)
+    plot1.plot(time, signal, label="signal", linewidth=2)
+    plot1.plot(time, fourier_series, label="Fourier Series")
+    plot1.set_title(os.path.basename(file_path))
+    plot1.set_xlabel("time (seconds)")
+    plot1.set_ylabel("signal")
+    fig.legend()
+
+    # Keep the extension in the name so a .dat and .csv of the same capture don't overwrite each other
+    base_name, extension = os.path.splitext(os.path.basename(file_path))
+    save_path = os.path.join(figure_folder, f"{base_name}_{extension[1:]}.png")
+    fig.savefig(save_path)
+    return save_path
+
+
+def analyze_file(job):
+    """
+    Worker: read one file, select its components and optionally reconstruct and plot it
+    :param job: (file path, num terms, backend, reconstruct, figure folder or None, collect metrics,
+                 dtype to read the signal as)
+    :return: dict describing the file and its components (or the error)
+    """
+    file_path, num_terms, backend, reconstruct, figure_folder, collect_metrics, dtype = job
+    result = {"file": file_path, "error": None, "components": []}
+    if collect_metrics:
+        metrics.clear()
+        metrics.enable()
+    try:
+        start_time = time.perf_counter()
+        sample_times, signal = read_signal(file_path, dtype)
+        read_time = time.perf_counter()
+        fft = FFT(sample_times, signal)
+        spectrum = fft.get_spectrum(num_terms, backend)
+        transform_time = time.perf_counter()
+
+        dt = float(sample_times[1] - sample_times[0])
+        result.update(num_samples=len(fft), dt=dt,
+                      read_seconds=read_time - start_time,
+                      transform_seconds=transform_time - read_time)
+        result["components"] = [{"mag": mag, "freq": freq, "freq_time": freq / dt, "phase": phase}
+                                for mag, freq, phase in spectrum.to_components()]
+
+        if reconstruct or figure_folder:
+            fourier_series = fft.reconstruct(spectrum)
+            result["reconstruct_seconds"] = time.perf_counter() - transform_time
+            result["residual_rms"] = float(((signal - fourier_series) ** 2).mean() ** 0.5)
+            if figure_folder:
+                with metrics.stage("render", samples=len(signal)):
+                    result["figure"] = save_plot(file_path, sample_times, signal, fourier_series,
+                                                 figure_folder)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if collect_metrics:
+        result["metrics"] = metrics.records  # workers are separate processes, so send them back
+        metrics.disable()
+    return result
+
+
+def write_results(results, output_path):
+    """
+    Write all results as json, or as a csv table with one row per component
+    """
+    if output_path.endswith(".json"):
+        with open(output_path, "wt") as fout:
+            json.dump(results, fout, indent=2)
+        return
+
+    fields = ["file", "num_samples", "dt", "rank", "mag", "freq", "freq_time", "phase",
+              "read_seconds", "transform_seconds", "reconstruct_seconds", "residual_rms", "figure", "error"]
+    with open(output_path, "wt", newline="") as fout:
+        writer = csv.DictWriter(fout, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            # Files that failed (or have no components) still get one row so nothing goes missing
+            for rank, component in enumerate(result["components"] or [{}], start=1):
+                writer.writerow({**result, **component, "rank": rank if component else None})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the Fourier components of many signal files")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of .dat/.csv/.sig files")
+    parser.add_argument("--num-terms", type=int, default=6)
+    parser.add_argument("--backend", choices=list(FFT.BACKENDS), default="numpy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("--reconstruct", action="store_true", help="also reconstruct the series")
+    parser.add_argument("--figures", help="folder to save a png per file into (implies --reconstruct)")
+    parser.add_argument("--output", default="results.csv", help="results table (.csv or .json)")
+    parser.add_argument("--float32", action="store_true",
+                        help="read and transform in single precision (half the memory, see README)")
+    parser.add_argument("--metrics", help="also write per-stage timings of every file to this json file")
+    args = parser.parse_args(argv)
+
+    file_paths = find_files(args.inputs)
+    if not file_paths:
+        print("No .dat, .csv or .sig files found")
+        return 1
+    if args.figures:
+        os.makedirs(args.figures, exist_ok=True)
+
+    dtype = np.float32 if args.float32 else np.float64
+    jobs = [(file_path, args.num_terms, args.backend, args.reconstruct, args.figures, bool(args.metrics), dtype)
+            for file_path in file_paths]
+    start_time = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            chunk_size = max(1, len(jobs) // (4 * args.workers))  # few round trips, still balanced
+            results = list(pool.map(analyze_file, jobs, chunksize=chunk_size))
+    else:
+        results = [analyze_file(job) for job in jobs]
+    elapsed = time.perf_counter() - start_time
+
+    if args.metrics:
+        collected = Metrics()
+        for result in results:
+            collected.records.extend(dict(entry, file=result["file"]) for entry in result.pop("metrics"))
+        collected.to_json(args.metrics)
+
+    write_results(results, args.output)
+    failed = [result for result in results if result["error"]]
+    for result in failed:
+        print(f"Failed {result['file']}: {result['error']}")
+    print(f"Processed {len(results)} files in {elapsed:.2f} s "
+          f"({len(results) / elapsed:.1f} files/s, {args.workers} workers), wrote {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
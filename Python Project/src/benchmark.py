@@ -0,0 +1,248 @@
+"""
+Benchmark the FFT backends, component extraction, file ingestion, parallel scaling and cold start
+
+Runs every backend in FFT.BACKENDS over a sweep of sizes and signal shapes built with the
+generators in signal_data.py, writes the timings as JSON and optionally compares them
+against a stored baseline run.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --output new.json --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from given.readers import read_binary, read_csv
+from given.fft import FFT
+from given.spectrum import Spectrum
+from given import signal_data
+
+# Largest size each slow backend is run at, the rest run at every size
+MAX_SIZE = {
+    "simple": 1024,
+    "cooley_turkey": 1 << 15,
+    "naive": 1 << 12,
+}
+
+SHAPES = {
+    "square": signal_data.generate_square_wave,
+    "triangle": signal_data.generate_triangle_wave,
+    "sawtooth": signal_data.generate_sawtooth_wave,
+}
+
+
+def make_signal(shape, num_samples, num_terms=8, period=5.0, noise_level=0.5):
+    """
+    Build a noisy test signal from one of the signal_data term generators
+    :return: time and noisy signal as float64 arrays
+    """
+    amp, freq = SHAPES[shape](num_terms, period)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sample_times, _, noisy = signal_data.generate_signals(amp, freq, 0 * freq, 4 * period,
+                                                              num_samples, noise_level)
+    return sample_times, noisy
+
+
+def best_of(repeats, func):
+    """
+    Run func repeats times and keep the fastest wall time (least disturbed by the rest of the system)
+    :return: (fastest seconds, result of the last call)
+    """
+    best, result = float("inf"), None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+
+def bench_transforms(sizes, shapes, backends, repeats, num_terms):
+    """
+    Time each backend transform and the top-k component extraction separately
+    """
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            sample_times, signal = make_signal(shape, size)
+            fft = FFT(sample_times, signal)
+
+            for backend in backends:
+                if size > MAX_SIZE.get(backend, size):
+                    continue
+                if backend not in FFT.ARBITRARY_LENGTH and size & (size - 1):
+                    continue  # power of 2 only backend
+
+                method = getattr(fft, FFT.BACKENDS[backend])
+                seconds = float("inf")
+                for _ in range(repeats):
+                    _, transform_time = method(size, as_spectrum=True)
+                    seconds = min(seconds, transform_time)
+                results.append({"stage": "transform", "backend": backend, "shape": shape,
+                                "size": size, "seconds": seconds})
+
+            # Extraction is the same for every backend, so time it once on numpy output
+            complex_val = np.fft.fft(signal)
+            seconds, _ = best_of(repeats, lambda: Spectrum.from_complex(complex_val)[:(size + 1) // 2]
+                                 .top(num_terms).to_components())
+            results.append({"stage": "extraction", "backend": "numpy", "shape": shape,
+                            "size": size, "seconds": seconds})
+    return results
+
+
+def bench_ingestion(sizes, repeats):
+    """
+    Time reading .dat and .csv files written by signal_data
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as folder_name:
+        for size in sizes:
+            sample_times, signal = make_signal("square", size)
+            signal_data.write_data_as_binary(sample_times, signal, signal, 0, folder_name)
+            signal_data.write_data_as_csv(sample_times, signal, signal, 0, folder_name)
+
+            for reader, extension in ((read_binary, "dat"), (read_csv, "csv")):
+                file_path = os.path.join(folder_name, f"noisy_signal_0.{extension}")
+                seconds, _ = best_of(repeats, lambda: reader(file_path))
+                results.append({"stage": "ingestion", "backend": extension, "shape": "square",
+                                "size": size, "bytes": os.path.getsize(file_path),
+                                "seconds": seconds})
+    return results
+
+
+def bench_scaling(size, workers_list, repeats):
+    """
+    Time the parallel backend on one large transform at each worker count
+    Speedup is against the same backend on one worker
+    """
+    results = []
+    sample_times, signal = make_signal("square", size)
+    fft = FFT(sample_times, signal)
+    single = None
+    for workers in workers_list:
+        fft.parallel_workers = workers
+        seconds = min(fft.parallel_fft(size, as_spectrum=True, real=True)[1] for _ in range(repeats))
+        single = seconds if single is None else single
+        results.append({"stage": "scaling", "backend": "parallel", "shape": "square", "size": size,
+                        "workers": workers, "seconds": seconds, "speedup": single / seconds})
+    return results
+
+
+# Cold start of a fresh interpreter: the headless core against also loading the plotting stack
+STARTUP_IMPORTS = {
+    "headless": "import given",
+    "plotting": "import given, matplotlib.pyplot",
+}
+
+
+def bench_startup(repeats):
+    """
+    Time starting a new Python process that imports the core, as every batch worker does
+    Also records whether the headless import pulled in matplotlib or tkinter
+    """
+    results = []
+    src_folder = os.path.dirname(os.path.abspath(__file__))
+    check = "; import sys; print(int(any(m in sys.modules for m in ('matplotlib', 'tkinter'))))"
+    for name, statement in STARTUP_IMPORTS.items():
+        seconds, output = best_of(repeats, lambda: subprocess.run(
+            [sys.executable, "-c", statement + check], cwd=src_folder, capture_output=True,
+            text=True, check=True).stdout)
+        results.append({"stage": "startup", "backend": name, "shape": "-", "size": 0,
+                        "seconds": seconds, "gui_modules_loaded": output.strip() == "1"})
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Find results slower than the matching baseline entry by more than tolerance (fraction)
+    :return: list of (result, baseline seconds) for each regression
+    """
+    def key(entry):
+        return entry["stage"], entry["backend"], entry["shape"], entry["size"], entry.get("workers")
+
+    previous = {key(entry): entry["seconds"] for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old_seconds = previous.get(key(entry))
+        if old_seconds is not None and entry["seconds"] > old_seconds * (1.0 + tolerance):
+            regressions.append((entry, old_seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark FFT backends, extraction and ingestion")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 1033, 4096, 1 << 16, 1 << 20])
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--backends", nargs="+", choices=list(FFT.BACKENDS), default=list(FFT.BACKENDS))
+    parser.add_argument("--ingest-sizes", type=int, nargs="*", default=[1 << 14, 1 << 18])
+    parser.add_argument("--scaling-size", type=int, default=1 << 22,
+                        help="transform size for the parallel scaling curve (0 to skip, "
+                             "otherwise at least FFT.PARALLEL_MIN_SAMPLES)")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="worker counts for the scaling curve (1, 2, 4, ... up to all cores if not given)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--num-terms", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    if 0 < args.scaling_size < FFT.PARALLEL_MIN_SAMPLES:
+        # parallel_fft runs smaller transforms on one thread, so the curve would only show noise
+        parser.error(f"--scaling-size must be 0 or at least {FFT.PARALLEL_MIN_SAMPLES} "
+                     "(FFT.PARALLEL_MIN_SAMPLES), smaller transforms always run on one thread")
+
+    np.random.seed(args.seed)  # generate_signals draws its noise from the global generator
+    results = bench_transforms(args.sizes, args.shapes, args.backends, args.repeats, args.num_terms)
+    results += bench_ingestion(args.ingest_sizes, args.repeats)
+    if args.scaling_size:
+        cores = os.cpu_count() or 1
+        workers_list = args.workers or sorted({2**i for i in range(cores.bit_length())} | {cores})
+        results += bench_scaling(args.scaling_size, workers_list, args.repeats)
+    results += bench_startup(args.repeats)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "wt") as fout:
+        json.dump(report, fout, indent=2)
+
+    for entry in results:
+        backend = entry["backend"] + (f" x{entry['workers']}" if "workers" in entry else "")
+        print(f"{entry['stage']:>10} {backend:>13} {entry['shape']:>8} "
+              f"{entry['size']:>9d} {entry['seconds'] * 1e3:12.3f} ms"
+              + (f"  {entry['speedup']:.2f}x" if "speedup" in entry else ""))
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "rt") as fin:
+            regressions = compare(results, json.load(fin), args.tolerance)
+        for entry, old_seconds in regressions:
+            print(f"REGRESSION {entry['stage']} {entry['backend']} {entry['shape']} {entry['size']}: "
+                  f"{old_seconds * 1e3:.3f} ms -> {entry['seconds'] * 1e3:.3f} ms")
+        if regressions:
+            return 1
+        print("No regressions against", args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,11 @@
 import tkinter
 import os
-import csv
-from given.demo_fft import *
+import queue
+import threading
+from given.analysis_cache import AnalysisCache
+from given.decimate import min_max_decimate
+from given.incremental_series import IncrementalSeries
+from given.metrics import metrics
 
 try:
     from tkinter import *
@@ -13,17 +17,17 @@ except ImportError:
     exit(1)
 
 try:
-    import matplotlib.pyplot as plt
     from matplotlib.figure import Figure
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 except ImportError:
     print("matplotlib did not import successfully - check you are running Python 3 and that matplotlib is available.")
     exit(1)
 
-import numpy as np
-
 
 class FourierGUI:
+    # Most terms the Num Terms spinbox offers, and the IncrementalSeries keeps ranked
+    MAX_TERMS = 64
+
     def __init__(self):
 
         self.root = Tk()
@@ -67,12 +71,43 @@ class FourierGUI:
         self.box_text = Label(self.grid, text="Num Terms")
         self.box_text.grid(row=3, column=1)
         self.M = tkinter.StringVar(value=6)
-        self.spin_box = ttk.Spinbox(self.grid, from_=1, to=64, textvariable=self.M, wrap=True, width=5)
+        self.spin_box = ttk.Spinbox(self.grid, from_=1, to=self.MAX_TERMS, textvariable=self.M, wrap=True,
+                                    width=5)
         self.spin_box.grid(row=3, column=2, padx=20, pady=20)
+        self.series = None  # IncrementalSeries of the plotted file, lets the spinbox re-sum live
+        self.last_analysis = None
+        self.M.trace_add("write", self.on_terms_changed)
 
-    # initialize frame
+    # initialize frame with one persistent figure, canvas and toolbar that every plot reuses
         self.plot_frame = Frame(self.grid)
         self.plot_frame.grid(row=5, column=1, columnspan=4)
+        self.figure = Figure()
+        self.plot1 = self.figure.add_subplot(111)
+        self.plot1.set_xlabel("time (seconds)")
+        self.plot1.set_ylabel("signal")
+        self.signal_line, = self.plot1.plot([], [], label="signal", linewidth=2)
+        self.series_line, = self.plot1.plot([], [], label="Fourier Series")
+        self.legend = self.figure.legend()
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.plot_frame)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.plot_frame)
+        self.canvas.get_tk_widget().pack()
+        self.plot_data_full = None  # (time, signal, fourier series) behind the decimated lines
+        self.plot1.callbacks.connect("xlim_changed", self.update_level_of_detail)
+
+    # keep parsed files, spectra and reconstructions so plot and save don't redo them
+        self.cache = AnalysisCache()
+
+    # background analysis: progress, cancel button and the queue results come back on
+        self.progress = ttk.Progressbar(self.grid, mode="indeterminate", length=120)
+        self.progress.grid(row=3, column=3)
+        self.status = Label(self.grid, text="")
+        self.status.grid(row=4, column=2, columnspan=2)
+        self.cancel_button = Button(self.grid, text="Cancel", command=self.cancel_job, state=DISABLED)
+        self.cancel_button.grid(row=3, column=4)
+        self.job_ids = {"plot": 0, "save": 0}  # latest job of each kind, older results are stale
+        self.job_cancels = {}  # kind -> cancel event of the job of that kind still running
+        self.job_results = queue.Queue()
+        self.root.after(50, self.poll_jobs)
 
     # initislize terms list
         self.terms = Label(self.grid)
@@ -80,20 +115,6 @@ class FourierGUI:
 
         self.grid.pack()
 
-    @staticmethod
-    def read_csv(file_path):
-        """
-        reads signal data from csv file
-        """
-        seconds, nanoseconds, signal = [], [], []
-        with open(file_path, "rt") as file:
-            reader = csv.reader(file, delimiter=",")
-            for row in reader:
-                seconds.append(int(row[0]))
-                nanoseconds.append(int(row[1]))
-                signal.append(float(row[2]))
-        return np.array(seconds) - seconds[0] + 1.0e-9 * np.array(nanoseconds), np.array(signal)
-
     def pick_color(self):
         """
         Command when color button is pressed. Selects plot color.
@@ -108,12 +129,14 @@ class FourierGUI:
         try:
             self.file_path = filedialog.askopenfilename()
             self.file_name = str(self.file_path)[-18:]
-            if self.file_name[-3:] != "dat" and self.file_name[-3:] != "csv":
+            if self.file_name[-3:] not in ("dat", "csv", "sig"):
                 self.file_text = Label(self.grid, text=f"Selected File: {self.file_name} (Invalid File!)")
                 self.file_text.grid(row=1, column=2)
                 self.grid.pack()
                 raise TypeError("Invalid file!")
             self.save_path = os.path.join("figures", f"{self.file_name[:-4]}.png")
+            if self.job_cancels:
+                self.cancel_job()  # jobs for the previous file are no longer wanted
             self.file_text = Label(self.grid, text=f"Selected File: {self.file_name}")
             self.file_text.grid(row=1, column=2)
             self.grid.pack()
@@ -122,103 +145,215 @@ class FourierGUI:
 
     def plot_data(self):
         """
-        reads file and plots data
+        reads file and plots data, the analysis runs on a background thread
         """
         print(30 * "=")
+        self.start_job("plot", self.show_plot)
 
-        try:
+    def save_fig(self):
+        """
+        command when save button is pressed. run at the end of save as
+        """
+        self.start_job("save", self.write_fig)
 
-            fig = Figure()
-            plot1 = fig.add_subplot(111)
-            if self.file_path[-3:] == "dat":
-                time, signal = read_binary(self.file_path)
-            elif self.file_path[-3:] == "csv":
-                time, signal = self.read_csv(self.file_path)
-            else:
-                raise TypeError("Invalid file!")
-            fft = FFT(time, signal)
-            fourier_series_components = fft.get_fourier_components(int(self.M.get()))
-            if self.color1:
-                plot1.plot(time, signal, str(self.color1[1]), label="signal", linewidth=2)
-            else:
-                plot1.plot(time, signal, label="signal", linewidth=2)
+    def start_job(self, kind, on_done):
+        """
+        Analyze the selected file on a worker thread, superseding any job of the same kind still running
+        Plot and save jobs are separate, so saving while a plot is running doesn't lose the plot
+        :param kind: "plot" or "save"
+        :param on_done: called on the Tk thread with the analysis results when the job finishes
+        """
+        try:
+            file_path, num_terms = self.file_path, int(self.M.get())
+        except (AttributeError, ValueError) as e:
+            print("Failed to plot data! ", e)
+            return
+        if not 1 <= num_terms <= self.MAX_TERMS:
+            # The spinbox takes typed values outside its range, show the count actually used
+            num_terms = max(1, min(num_terms, self.MAX_TERMS))
+            self.M.set(num_terms)
+
+        if kind in self.job_cancels:
+            self.job_cancels[kind].set()  # the old job stops at its next stage, its results are ignored
+        self.job_ids[kind] += 1
+        job_id, cancel = self.job_ids[kind], threading.Event()
+        self.job_cancels[kind] = cancel
+
+        def progress(stage):
+            if cancel.is_set():
+                raise InterruptedError("Cancelled")
+            self.job_results.put((kind, job_id, "progress", stage))
+
+        def work():
+            try:
+                result = self.cache.analyze(file_path, num_terms, progress)
+                analysis = self.cache.lookup(file_path)
+                self.job_results.put((kind, job_id, "done", (on_done, file_path, result, analysis)))
+            except InterruptedError:
+                self.job_results.put((kind, job_id, "cancelled", None))
+            except Exception as e:
+                self.job_results.put((kind, job_id, "error", e))
+
+        self.status.config(text="Working...")
+        self.cancel_button.config(state=NORMAL)
+        self.progress.start(10)
+        threading.Thread(target=work, daemon=True).start()
+
+    def cancel_job(self):
+        """
+        command when cancel button is pressed. abandons every running job
+        """
+        for kind, cancel in list(self.job_cancels.items()):
+            cancel.set()
+            self.job_ids[kind] += 1  # anything still coming from the old job is now stale
+            self.finish_job(kind, "Cancelled")
 
-            fourier_series = np.zeros(fft._time.shape)
-            dt = time[1] - time[0]
+    def finish_job(self, kind, message):
+        """
+        Forget a finished job, and stop the progress display once nothing is running
+        """
+        self.job_cancels.pop(kind, None)
+        if not self.job_cancels:
+            self.progress.stop()
+            self.cancel_button.config(state=DISABLED)
+        self.status.config(text=message)
 
-            for components in fourier_series_components:
-                mag, freq, phase = components
-                fourier_series += mag * np.cos((freq / dt) * fft._time + phase)
-            if self.color2:
-                plot1.plot(time, fourier_series, str(self.color2[1]), label="Fourier Series")
+    def poll_jobs(self):
+        """
+        Handle messages from worker threads on the Tk thread, then check again shortly
+        """
+        try:
+            while True:
+                kind, job_id, message, payload = self.job_results.get_nowait()
+                if job_id != self.job_ids[kind]:
+                    continue  # superseded or cancelled job
+                if message == "progress":
+                    self.status.config(text=f"Working: {payload}...")
+                elif message == "done":
+                    on_done, file_path, result, self.last_analysis = payload
+                    self.finish_job(kind, "")
+                    on_done(file_path, *result)
+                elif message == "error":
+                    self.finish_job(kind, "Failed!")
+                    print("Failed to plot data! ", payload)
+                else:
+                    self.finish_job(kind, "Cancelled")
+        except queue.Empty:
+            pass
+        self.root.after(50, self.poll_jobs)
+
+    def make_figure(self, file_path, time, signal, fourier_series):
+        """
+        Build a standalone figure of the signal and its Fourier series in the chosen colors
+        """
+        fig = Figure()
+        plot1 = fig.add_subplot(111)
+        num_bins = fig.get_figwidth() * fig.dpi  # one min/max pair per pixel column
+        if self.color1:
+            plot1.plot(*min_max_decimate(time, signal, num_bins), str(self.color1[1]), label="signal",
+                       linewidth=2)
+        else:
+            plot1.plot(*min_max_decimate(time, signal, num_bins), label="signal", linewidth=2)
+
+        if self.color2:
+            plot1.plot(*min_max_decimate(time, fourier_series, num_bins), str(self.color2[1]),
+                       label="Fourier Series")
+        else:
+            plot1.plot(*min_max_decimate(time, fourier_series, num_bins), label="Fourier Series")
+
+        plot1.set_title(str(file_path)[-18:])
+        plot1.set_xlabel("time (seconds)")
+        plot1.set_ylabel("signal")
+        fig.legend()
+        return fig
+
+    def show_plot(self, file_path, time, signal, spectrum, fourier_series):
+        """
+        Put a finished analysis on screen by swapping the data of the persistent lines
+        """
+        try:
+            if self.last_analysis is not None:
+                # Keep the ranked terms so spinbox changes only add or subtract terms from here on
+                self.series = IncrementalSeries(self.last_analysis.fft, self.last_analysis.half_spectrum,
+                                                len(spectrum), fourier_series, self.MAX_TERMS)
+                fourier_series = self.series.fourier_series
             else:
-                plot1.plot(time, fourier_series, label="Fourier Series")
-
-            plot1.set_title(str(self.file_path)[-18:])
-            plot1.set_xlabel("time (seconds)")
-            plot1.set_ylabel("signal")
-            fig.legend()
-
-        # Re-create plot_frame so we only have one plot showing at a time
-            self.plot_frame = Frame(self.grid)
-            self.plot_frame.grid(row=5, column=1, columnspan=4)
-            canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-            canvas.get_tk_widget().pack()
-            canvas.draw()
-
-        # display fourier terms
-            self.terms.destroy()
-
-            row = 6
-            label_string = 'First 5 Fourier Terms Plotted:\n'
-            for components in fourier_series_components:
-                if row - 6 < 5:
-                    mag, freq, _ = components
-                    label_string += f"Mag = {mag:.3f}  Freq = {freq:.3f}\n"
-                    row += 1
-            self.terms = Label(self.grid, text=label_string)
-            self.terms.grid(row=5, column=5)
-            self.grid.pack()
+                self.series = None  # evicted or changed on disk, the old series is for another file
+            self.plot_data_full = (time, signal, fourier_series)
+
+            # Colors fall back to the first two of the default cycle, as a fresh plot would use
+            self.signal_line.set_color(str(self.color1[1]) if self.color1 else "C0")
+            self.series_line.set_color(str(self.color2[1]) if self.color2 else "C1")
+            self.legend.remove()
+            self.legend = self.figure.legend()  # legend entries copy the line colors when made
+            self.plot1.set_title(str(file_path)[-18:])
+
+            # Show the whole signal, setting the limits re-decimates through update_level_of_detail
+            self.update_level_of_detail(self.plot1, start_time=time[0], end_time=time[-1])
+            self.plot1.relim()
+            self.plot1.autoscale_view()
+            self.plot1.set_xlim(time[0], time[-1])
+            self.toolbar.update()  # new home view for the toolbar
+            self.canvas.draw_idle()
+
+            self.show_terms(spectrum.to_components())
+            self.on_terms_changed()  # catch up if the spinbox moved while the job was running
             print(" Done plotting data! ")
         except Exception as e:
             print("Failed to plot data! ", e)
 
-    def save_fig(self):
+    def show_terms(self, fourier_series_components):
         """
-        command when save button is pressed. run at the end of save as
+        display fourier terms
+        """
+        row = 6
+        label_string = 'First 5 Fourier Terms Plotted:\n'
+        for components in fourier_series_components:
+            if row - 6 < 5:
+                mag, freq, _ = components
+                label_string += f"Mag = {mag:.3f}  Freq = {freq:.3f}\n"
+                row += 1
+        self.terms.config(text=label_string)
+
+    def on_terms_changed(self, *args):
+        """
+        Called when the Num Terms spinbox changes. Re-sums the plotted series without the FFT
         """
         try:
-            fig = Figure()
-            plot1 = fig.add_subplot(111)
-            if self.file_path[-3:] == "dat":
-                time, signal = read_binary(self.file_path)
-            elif self.file_path[-3:] == "csv":
-                time, signal = self.read_csv(self.file_path)
-            else:
-                raise TypeError("Invalid file!")
-            fft = FFT(time, signal)
-            fourier_series_components = fft.get_fourier_components(int(self.M.get()))
-            if self.color1:
-                plot1.plot(time, signal, str(self.color1[1]), label="signal", linewidth=2)
-            else:
-                plot1.plot(time, signal, label="signal", linewidth=2)
-
-            fourier_series = np.zeros(fft._time.shape)
-            dt = time[1] - time[0]
+            num_terms = max(1, min(int(self.M.get()), self.MAX_TERMS))
+        except ValueError:
+            return  # part way through typing a number
+        if self.series is None or num_terms == self.series.num_terms:
+            return
 
-            for components in fourier_series_components:
-                mag, freq, phase = components
-                fourier_series += mag * np.cos((freq / dt) * fft._time + phase)
-            if self.color2:
-                plot1.plot(time, fourier_series, str(self.color2[1]), label="Fourier Series")
-            else:
-                plot1.plot(time, fourier_series, label="Fourier Series")
+        self.series.set_terms(num_terms)
+        self.update_level_of_detail(self.plot1)
+        self.show_terms(self.series.components().to_components())
 
-            plot1.set_title(str(self.file_path)[-18:])
-            plot1.set_xlabel("time (seconds)")
-            plot1.set_ylabel("signal")
-            fig.legend()
-            fig.savefig(self.save_path)
+    def update_level_of_detail(self, axes, start_time=None, end_time=None):
+        """
+        Re-decimate the lines for the visible time range at the canvas pixel width
+        Connected to xlim_changed, so panning and zooming with the toolbar come through here
+        """
+        if self.plot_data_full is None:
+            return
+        if start_time is None:
+            start_time, end_time = axes.get_xlim()
+        time, signal, fourier_series = self.plot_data_full
+        num_bins = axes.get_window_extent().width
+        with metrics.stage("render", samples=len(time), pixels=int(num_bins)):
+            self.signal_line.set_data(*min_max_decimate(time, signal, num_bins, start_time, end_time))
+            self.series_line.set_data(*min_max_decimate(time, fourier_series, num_bins, start_time, end_time))
+        self.canvas.draw_idle()
+
+    def write_fig(self, file_path, time, signal, spectrum, fourier_series):
+        """
+        Save a finished analysis to the save path
+        """
+        try:
+            with metrics.stage("render", samples=len(time), file=str(self.save_path)):
+                fig = self.make_figure(file_path, time, signal, fourier_series)
+                fig.savefig(self.save_path)
         except Exception as e:
             print("Failed to plot data! ", e)
 
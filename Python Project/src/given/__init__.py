@@ -0,0 +1,10 @@
+"""
+Headless core for reading signal files, transforming them and reconstructing Fourier series
+
+Importing this package only loads Numpy. Plotting (matplotlib) and the GUI (tkinter) are
+imported by the scripts that need them, so worker processes start quickly.
+"""
+from given.fft import FFT
+from given.multichannel import MultiChannelFFT
+from given.readers import read_binary, read_binary_records, read_csv, read_signal
+from given.spectrum import Spectrum
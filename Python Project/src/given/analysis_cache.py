@@ -0,0 +1,148 @@
+"""
+A least recently used cache of analysed signal files
+
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from given.readers import read_signal
+from given.fft import FFT
+
+
+class Analysis:
+    """
+    Everything computed for one version of a signal file
+    The half spectrum is kept so any number of terms can be selected without a new transform
+    """
+    def __init__(self, time, signal, fft, half_spectrum):
+        self.time = time
+        self.signal = signal
+        self.fft = fft
+        self.half_spectrum = half_spectrum
+        self.series = {}  # num_terms -> (top spectrum, reconstructed fourier series)
+
+    @property
+    def nbytes(self):
+        """
+        Return the memory held by the arrays of this analysis
+        """
+        total = self.time.nbytes + self.signal.nbytes
+        total += sum(values.nbytes for values in self.__spectrum_arrays(self.half_spectrum))
+        for spectrum, fourier_series in self.series.values():
+            total += fourier_series.nbytes
+            total += sum(values.nbytes for values in self.__spectrum_arrays(spectrum))
+        return total
+
+    @staticmethod
+    def __spectrum_arrays(spectrum):
+        return spectrum.mag, spectrum.freq, spectrum.phase
+
+
+class AnalysisCache:
+    """
+    Cache of Analysis objects keyed on file path, modification time and size, evicted
+    least recently used first once the arrays held exceed max_bytes
+    Safe to share between threads. Reading, transforming and reconstructing run outside the lock,
+    so jobs on different files don't wait for each other
+    """
+    def __init__(self, max_bytes=512 * 1024**2):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        """
+        Return the number of files held
+        """
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """
+        Return the memory currently held by the cached arrays
+        """
+        return self._nbytes
+
+    def analyze(self, file_path, num_terms, progress=None):
+        """
+        Read, transform and reconstruct a signal file, reusing any earlier work on the same file version
+        :param file_path: path to .dat or .csv file
+        :param num_terms: Number of Fourier terms to reconstruct with
+        :param progress: optional callable given "read", "transform" or "reconstruct" before each
+                         stage that actually runs (it may raise to abandon the analysis)
+        :return: time, signal, Spectrum of the selected terms and the reconstructed fourier series
+        """
+        progress = progress or (lambda stage: None)
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+
+        # The slow stages run without the lock, so a job that supersedes this one isn't held up
+        if analysis is None:
+            progress("read")
+            time, signal = read_signal(file_path)
+            progress("transform")
+            fft = FFT(time, signal)
+            fresh = Analysis(time, signal, fft, fft.get_half_spectrum())
+            with self._lock:
+                analysis = self._entries.get(key)  # another thread may have got there first
+                if analysis is None:
+                    self.__discard_path(key[0])  # older versions of a changed file will never be hit again
+                    analysis = fresh
+                    self._entries[key] = analysis
+                    self._nbytes += analysis.nbytes
+
+        with self._lock:
+            series = analysis.series.get(num_terms)
+        if series is None:
+            progress("reconstruct")
+            spectrum = analysis.half_spectrum.top(num_terms)
+            series = (spectrum, analysis.fft.reconstruct(spectrum))
+            with self._lock:
+                cached = self._entries.get(key) is analysis  # only count memory that is still cached
+                if cached:
+                    self._nbytes -= analysis.nbytes
+                series = analysis.series.setdefault(num_terms, series)
+                if cached:
+                    self._nbytes += analysis.nbytes
+
+        with self._lock:
+            self.__evict()
+        spectrum, fourier_series = series
+        return analysis.time, analysis.signal, spectrum, fourier_series
+
+    def lookup(self, file_path):
+        """
+        Return the cached Analysis of the current version of a file, or None if it isn't cached
+        """
+        with self._lock:
+            stat = os.stat(file_path)
+            return self._entries.get((os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size))
+
+    def clear(self):
+        """
+        Drop every cached analysis
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __discard_path(self, path):
+        """
+        Drop every cached version of one file
+        """
+        for key in [key for key in self._entries if key[0] == path]:
+            self._nbytes -= self._entries.pop(key).nbytes
+
+    def __evict(self):
+        """
+        Drop least recently used files until within budget, always keeping the newest one
+        """
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            _, analysis = self._entries.popitem(last=False)
+            self._nbytes -= analysis.nbytes
@@ -0,0 +1,181 @@
+"""
+Self-describing binary container (.sig) for uniformly sampled signals
+
+Layout, all in the byte order named in the header:
+    64 byte header   magic b"FSIG", version, byte order ('<' or '>'), value type ('d' float64 or
+                     'f' float32), sample count, start time (seconds, nanoseconds), sample
+                     interval, chunk size, chunk index offset and data offset
+    values           num_samples raw values, nothing else, so the block can be memory-mapped
+    chunk index      optional, per chunk of chunk_size samples: data byte offset, min and max
+
+Compared to the .dat layout this drops the per-sample timestamp (sampling is uniform), so
+float64 files are half the size and float32 files a quarter.
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+from given.metrics import metrics
+
+MAGIC = b"FSIG"
+VERSION = 1
+HEADER_FORMAT = "4sBccxQqqdQQQ"  # packs to exactly HEADER_SIZE bytes
+HEADER_SIZE = 64
+VALUE_TYPES = {"d": np.float64, "f": np.float32}
+INDEX_FIELDS = [("offset", "u8"), ("min", "f8"), ("max", "f8")]
+
+
+def write_container(file_path, signal, sample_interval, start_seconds=0, start_nanoseconds=0,
+                    value_type="d", chunk_size=1 << 16, byte_order="<"):
+    """
+    Write a uniformly sampled signal as a .sig container
+    :param file_path: path of the file to create
+    :param signal: sample values
+    :param sample_interval: seconds between samples
+    :param start_seconds: whole seconds of the first sample's timestamp
+    :param start_nanoseconds: nanoseconds of the first sample's timestamp
+    :param value_type: 'd' to store float64 or 'f' to store float32
+    :param chunk_size: samples per chunk index entry, 0 for no index
+    :param byte_order: '<' little or '>' big endian
+    """
+    assert value_type in VALUE_TYPES, f"Unknown value type {value_type}"
+    assert byte_order in ("<", ">"), f"Unknown byte order {byte_order}"
+    values = np.asarray(signal, dtype=np.dtype(VALUE_TYPES[value_type]).newbyteorder(byte_order))
+    num_samples = len(values)
+
+    index_offset = 0
+    if chunk_size:
+        index_offset = HEADER_SIZE + values.nbytes
+    header = struct.pack(byte_order + HEADER_FORMAT, MAGIC, VERSION, byte_order.encode(),
+                         value_type.encode(), num_samples, start_seconds, start_nanoseconds,
+                         sample_interval, chunk_size, index_offset, HEADER_SIZE)
+
+    with open(file_path, "wb") as fout:
+        fout.write(header)
+        values.tofile(fout)
+        if chunk_size:
+            starts = np.arange(0, num_samples, chunk_size)
+            index = np.empty(len(starts), dtype=np.dtype(INDEX_FIELDS).newbyteorder(byte_order))
+            index["offset"] = HEADER_SIZE + starts * values.itemsize
+            if num_samples:
+                index["min"] = np.minimum.reduceat(values, starts)
+                index["max"] = np.maximum.reduceat(values, starts)
+            index.tofile(fout)
+
+
+def read_container_header(file_path):
+    """
+    Read the header of a .sig container
+    :return: dict of the header fields
+    """
+    with open(file_path, "rb") as fin:
+        raw = fin.read(HEADER_SIZE)
+    assert len(raw) == HEADER_SIZE and raw[:4] == MAGIC, f"{file_path} is not a signal container"
+
+    byte_order = raw[5:6].decode()  # single bytes read the same in either byte order
+    fields = struct.unpack(byte_order + HEADER_FORMAT, raw)
+    _, version, _, value_type, num_samples, start_seconds, start_nanoseconds, sample_interval, \
+        chunk_size, index_offset, data_offset = fields
+    assert version == VERSION, f"Unsupported container version {version}"
+    return {
+        "byte_order": byte_order,
+        "value_type": value_type.decode(),
+        "num_samples": num_samples,
+        "start_seconds": start_seconds,
+        "start_nanoseconds": start_nanoseconds,
+        "sample_interval": sample_interval,
+        "chunk_size": chunk_size,
+        "index_offset": index_offset,
+        "data_offset": data_offset,
+    }
+
+
+def open_container(file_path):
+    """
+    Memory-map the values of a .sig container without parsing or copying them
+    :return: header dict and read-only np.memmap of the values
+    """
+    header = read_container_header(file_path)
+    dtype = np.dtype(VALUE_TYPES[header["value_type"]]).newbyteorder(header["byte_order"])
+    if header["num_samples"] == 0:
+        return header, np.zeros(0, dtype=dtype)
+    values = np.memmap(file_path, dtype=dtype, mode="r", offset=header["data_offset"],
+                       shape=(header["num_samples"],))
+    return header, values
+
+
+def read_container_index(file_path):
+    """
+    Read the chunk index of a .sig container
+    :return: structured array with 'offset', 'min' and 'max' per chunk, or None if there is no index
+    """
+    header = read_container_header(file_path)
+    if not header["chunk_size"]:
+        return None
+    dtype = np.dtype(INDEX_FIELDS).newbyteorder(header["byte_order"])
+    num_chunks = -(-header["num_samples"] // header["chunk_size"])
+    with open(file_path, "rb") as fin:
+        fin.seek(header["index_offset"])
+        return np.fromfile(fin, dtype=dtype, count=num_chunks)
+
+
+def read_container(file_path, start=0, stop=None, dtype=np.float64):
+    """
+    Read (part of) a .sig container the same way read_binary reads a .dat file
+    :param file_path: path to .sig file
+    :param start: first sample to read
+    :param stop: one past the last sample to read (end of file if None)
+    :param dtype: np.float64, or np.float32 for a single precision signal (time stays float64)
+    :return: time relative to the start second (as read_binary measures it from the first
+             record's whole second) as float64, and signal as dtype
+    """
+    with metrics.stage("read", file=file_path, format="sig") as info:
+        header, values = open_container(file_path)
+        stop = len(values) if stop is None else min(stop, len(values))
+        time = 1.0e-9 * header["start_nanoseconds"] \
+            + np.arange(start, stop, dtype=np.float64) * header["sample_interval"]
+        signal = values[start:stop].astype(dtype)
+        info.update(samples=len(signal), bytes=signal.size * values.itemsize)
+    return time, signal
+
+
+def convert_to_container(source_path, file_path=None, value_type="d", chunk_size=1 << 16):
+    """
+    Convert a .dat or .csv signal file to a .sig container next to it
+    The sample interval is the average spacing of the original timestamps
+    :param source_path: path to .dat or .csv file
+    :param file_path: path of the container (source path with a .sig extension if None)
+    :return: path of the container written
+    """
+    from given.readers import read_binary_records, read_csv  # readers imports this module for .sig
+
+    if file_path is None:
+        file_path = os.path.splitext(source_path)[0] + ".sig"
+
+    if source_path.endswith(".dat"):
+        records = read_binary_records(source_path)
+        start_seconds, start_nanoseconds = int(records[0]["seconds"]), int(records[0]["nanoseconds"])
+        last = records[-1]
+        elapsed = (int(last["seconds"]) - start_seconds) + 1.0e-9 * (int(last["nanoseconds"]) - start_nanoseconds)
+        signal = records["signal"]
+    elif source_path.endswith(".csv"):
+        with open(source_path, "rt") as fin:
+            start_seconds, start_nanoseconds = (int(field) for field in fin.readline().split(",")[:2])
+        time, signal = read_csv(source_path)
+        elapsed = time[-1] - time[0]
+    else:
+        raise TypeError("Invalid file!")
+
+    sample_interval = elapsed / (len(signal) - 1) if len(signal) > 1 else 0.0
+    write_container(file_path, signal, sample_interval, start_seconds, start_nanoseconds,
+                    value_type, chunk_size)
+    return file_path
+
+
+if __name__ == '__main__':
+    # python -m given.container [--float32] files... converts each .dat/.csv file to .sig
+    float32 = "--float32" in sys.argv[1:]
+    for source in (arg for arg in sys.argv[1:] if arg != "--float32"):
+        print(f"{source} -> {convert_to_container(source, value_type='f' if float32 else 'd')}")
@@ -0,0 +1,43 @@
+"""
+Level of detail reduction for plotting long signals
+
+"""
+import numpy as np
+
+
+def min_max_decimate(time, signal, num_bins, start_time=None, end_time=None):
+    """
+    Reduce a signal to the smallest and largest sample of each of num_bins equal slices
+    Drawn as a line this looks the same as the full signal at num_bins pixels wide,
+    because every peak and trough inside a pixel column is kept
+    :param time: sample times (increasing)
+    :param signal: sample values
+    :param num_bins: number of slices, normally the plot width in pixels
+    :param start_time: only decimate samples from this time on (all samples if None)
+    :param end_time: only decimate samples up to this time (all samples if None)
+    :return: decimated time and signal, still in time order
+    """
+    # Keep one sample either side of the visible range so lines run off the edges of the plot
+    first = 0 if start_time is None else max(0, int(np.searchsorted(time, start_time)) - 1)
+    last = len(time) if end_time is None else min(len(time), int(np.searchsorted(time, end_time, "right")) + 1)
+    time, signal = time[first:last], signal[first:last]
+
+    num_bins = max(1, int(num_bins))
+    per_bin = len(time) // num_bins
+    if per_bin <= 2:
+        return time, signal  # already about as few points as pixels
+
+    binned = signal[:per_bin * num_bins].reshape(num_bins, per_bin)
+    offsets = np.arange(num_bins) * per_bin
+    lows = offsets + np.argmin(binned, axis=1)
+    highs = offsets + np.argmax(binned, axis=1)
+
+    # Leftover samples that don't fill a slice become one short extra slice
+    tail = signal[per_bin * num_bins:]
+    if len(tail):
+        lows = np.append(lows, per_bin * num_bins + np.argmin(tail))
+        highs = np.append(highs, per_bin * num_bins + np.argmax(tail))
+
+    # Interleave each slice's min and max in the order they occur
+    index = np.sort(np.stack((lows, highs), axis=1), axis=1).reshape(-1)
+    return time[index], signal[index]
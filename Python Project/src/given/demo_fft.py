@@ -1,38 +1,19 @@
 import os
-import struct
-
-import matplotlib.pyplot as plt
-import numpy as np
 
 from given.fft import FFT
-
-
-def read_binary(file_path):
-    print(f"Reading data from {file_path}")
-    with open(file_path, "rb") as fin:
-        byte_array = fin.read()
-
-        format_string = ">iid"
-        chunk_size = struct.calcsize(format_string)
-        num_chunks = len(byte_array) // chunk_size
-
-        seconds = []
-        nanoseconds = []
-        signal = []
-        for i in range(num_chunks):
-            data = struct.unpack(format_string, byte_array[i * chunk_size:(i + 1) * chunk_size])
-            seconds.append(data[0])
-            nanoseconds.append(data[1])
-            signal.append(data[2])
-
-        return np.array(seconds) - seconds[0] + 1.0e-9 * np.array(nanoseconds), np.array(signal)
+from given.metrics import metrics
+from given.readers import read_binary
 
 
 if __name__ == '__main__':
+    import matplotlib.pyplot as plt  # only the demo plots, importing the readers stays headless
 
     base_name = "signal_7"
     file_path = os.path.join("data", "noisy_"+base_name+".dat")
 
+    # Print each stage as it finishes, the library itself stays quiet
+    metrics.add_hook(lambda entry: print(f"  {entry['stage']:>14}: {1000 * entry['seconds']:8.3f} ms"))
+
     time, signal = read_binary(file_path)
 
     print(time[:10])
@@ -49,15 +30,13 @@ if __name__ == '__main__':
     plt.ylabel('signal')
     plt.title('Signal Data (first.last.yy)')
 
-    fourier_series = np.zeros(fft._time.shape)
     dt = time[1] - time[0]
     print("Fourier Components:")
     for components in fourier_series_components:
         mag, freq, phase = components
         print(f"{mag:8.3f}, {freq / dt:8.3f}, {phase:8.3f}")
 
-        # Be sure to convert sample frequency to time domain
-        fourier_series += mag * np.cos((freq / dt) * fft._time + phase)
+    fourier_series = fft.reconstruct(fourier_series_components)
 
     plt.plot(time, fourier_series, '-', label="Fourier Series")
 
@@ -2,26 +2,70 @@
 A class to handle calculating FFT data for given signals
 
 """
-import cmath #complex math
+import functools
 import math
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
+from given.metrics import metrics
+from given.spectrum import Spectrum
+
+
+def split_length(num_samples):
+    """
+    Split num_samples into N1 * N2 with N1 the largest factor not above sqrt(num_samples)
+    :return: (N1, N2)
+    """
+    for n1 in range(math.isqrt(num_samples), 0, -1):
+        if num_samples % n1 == 0:
+            return n1, num_samples // n1
+
 
 class FFT:
     """
     Class handling some standard FFT implementations with timing
     """
-    def __init__(self, sample_times=None, signal=None):
-        print("  Calling __init__ for FFT")
+    # Backend name -> method used by get_spectrum/get_fourier_components
+    BACKENDS = {
+        "numpy": "numpy_fft",
+        "iterative": "iterative_fft",
+        "bluestein": "bluestein_fft",
+        "parallel": "parallel_fft",
+        "cooley_turkey": "cooley_turkey_fft",
+        "simple": "simple_dft",
+        "naive": "naive_dft",
+    }
+
+    # Backends that accept any number of samples, the rest need a power of 2
+    ARBITRARY_LENGTH = {"numpy", "bluestein", "parallel", "simple", "naive"}
+
+    # Threads parallel_fft splits one transform over, all cores if None
+    # (set on the class, or on one FFT object)
+    parallel_workers = None
+
+    # Transforms shorter than this run parallel_fft's steps on the calling thread
+    PARALLEL_MIN_SAMPLES = 1 << 16
+
+    # Sizes whose twiddles, Bluestein chirps and kernels are kept for reuse. These are as big as
+    # the transform (a Bluestein kernel is 2 to 4 times bigger), so only the latest few are kept
+    CACHED_SIZES = 4
+
+    # Precisions accepted for time and signal. A float32 signal keeps the numpy, parallel and
+    # naive transforms, the Spectrum magnitudes and phases and the reconstruction in single
+    # precision (complex64), halving their memory; the other backends work in double precision
+    # internally, and frequencies and reconstruction angles are always double precision
+    DTYPES = (np.dtype(np.float64), np.dtype(np.float32))
 
+    def __init__(self, sample_times=None, signal=None):
         # Use assert to limit allowable data types
         assert isinstance(sample_times, np.ndarray), "Only Numpy arrays allowed for time"
         assert isinstance(signal, np.ndarray), "Only Numpy arrays allowed for signal"
         assert len(sample_times.shape)==1, "Only 1D time arrays allowed"
         assert len(signal.shape)==1, "Only 1D signal arrays allowed"
-        assert sample_times.dtype == np.float64, "Only double precision (float64) allowed"
-        assert signal.dtype == np.float64, "Only double precision (float64) allowed"
+        assert sample_times.dtype in FFT.DTYPES, "Only single (float32) or double precision (float64) allowed"
+        assert signal.dtype in FFT.DTYPES, "Only single (float32) or double precision (float64) allowed"
         assert sample_times.shape[0] == signal.shape[0], "time and signal must be same shape"
 
         self._time = sample_times
@@ -33,118 +77,329 @@ class FFT:
         """
         return self._time.shape[0]
 
-    def get_fourier_components(self, num_terms=6):
+    @property
+    def dtype(self):
+        """
+        Return the precision of the signal (np.float64 or np.float32)
+        """
+        return self._signal.dtype
+
+    def get_fourier_components(self, num_terms=6, backend="numpy", num_samples=None):
         """
         Get the most significant components from Fourier Transform
         :param num_terms: Number of terms to consider
+        :param backend: name of transform to use (see FFT.BACKENDS)
+        :param num_samples: Number of samples to transform (see get_spectrum)
+        :return: list of (amplitude, frequency, phase) tuples, biggest first
+        """
+        return self.get_spectrum(num_terms, backend, num_samples).to_components()
+
+    def get_spectrum(self, num_terms=6, backend="numpy", num_samples=None):
+        """
+        Get the most significant components from Fourier Transform as a Spectrum
+        :param num_terms: Number of terms to consider
+        :param backend: name of transform to use (see FFT.BACKENDS)
+        :param num_samples: Number of samples to transform (see get_half_spectrum)
+        :return: Spectrum ordered from biggest to smallest magnitude
         """
+        # Partially select the biggest num_terms instead of sorting them all
+        half_spectrum = self.get_half_spectrum(backend, num_samples)
+        with metrics.stage("extraction", samples=len(half_spectrum), terms=num_terms):
+            return half_spectrum.top(num_terms)
 
-        num_samples = 2**int(math.log2(len(self))) # largest power of two
-        all_components, _ = self.numpy_fft(num_samples)
+    def get_half_spectrum(self, backend="numpy", num_samples=None):
+        """
+        Get the non-redundant half of the Fourier Transform, in bin order
+        :param backend: name of transform to use (see FFT.BACKENDS)
+        :param num_samples: Number of samples to transform, defaults to the whole signal
+                            (or the largest power of two for power of 2 only backends)
+        :return: Spectrum of the first (N+1)//2 bins
+        """
+        assert backend in FFT.BACKENDS, f"Unknown backend {backend}, choose from {list(FFT.BACKENDS)}"
+
+        if num_samples is None:
+            if backend in FFT.ARBITRARY_LENGTH:
+                num_samples = len(self)
+            else:
+                num_samples = 2**int(math.log2(len(self))) # largest power of two
+        # The signal is real, so only the non-redundant half is ever computed
+        start_time = time.perf_counter()
+        spectrum, transform_time = getattr(self, FFT.BACKENDS[backend])(num_samples, as_spectrum=True, real=True)
+        if metrics.active:
+            # Backends time the transform alone, the rest of the call is building the Spectrum
+            metrics.record("transform", transform_time, backend=backend, samples=num_samples)
+            metrics.record("spectrum", time.perf_counter() - start_time - transform_time,
+                           samples=num_samples)
+
+        # Only get the first (N+1)//2 terms to consider (due to symmetry, and skipping Nyquist)
+        return spectrum[:(num_samples + 1) // 2]
+
+    def reconstruct(self, components, method="auto", block_elements=1 << 22):
+        """
+        Synthesize the Fourier series sum of mag * cos((freq / dt) * (time - time[0]) + phase) for all terms at once
+        Time is measured from the first sample, where the transform measures phase from
+        :param components: Spectrum or list of (amplitude, frequency, phase) tuples
+        :param method: "ifft" inverse transforms a sparse spectrum (terms must sit on bins of len(self),
+                       and samples are taken as exactly uniform so timestamp jitter is ignored),
+                       "blocked" evaluates all terms on a block of samples at a time,
+                       "auto" uses "ifft" whenever the terms allow it
+        :param block_elements: maximum number of (sample, term) entries per block for "blocked"
+        :return: reconstructed signal, same shape as the sample times
+        """
+        with metrics.stage("reconstruction", samples=len(self), method=method,
+                           terms=len(components)):
+            return self.__reconstruct(components, method, block_elements)
+
+    def __reconstruct(self, components, method, block_elements):
+        """
+        Work of reconstruct, timed there
+        """
+        assert method in ("auto", "ifft", "blocked"), f"Unknown reconstruction method {method}"
+        if not isinstance(components, Spectrum):
+            mag, freq, phase = (np.array(values, dtype=np.float64).reshape(-1)
+                                for values in zip(*components)) if components else (np.zeros(0),) * 3
+            components = Spectrum(mag, freq, phase)
+
+        n = len(self)
+        bins = components.freq * n / (2.0 * np.pi)
+        on_bins = bool(np.all(np.abs(bins - np.round(bins)) < 1.0e-6))
+        if method == "ifft" or (method == "auto" and on_bins):
+            assert on_bins, "ifft reconstruction needs frequencies on the bins of the whole signal"
+            # Each term is half in bin k and half (conjugated) in bin N-k, real part gives the cosine
+            terms = (components.mag * (0.5 * n)) * np.exp(1j * components.phase)
+            bins = np.round(bins).astype(np.int64) % n
+            spectrum = np.zeros(n, dtype=np.result_type(self.dtype, np.complex64))
+            np.add.at(spectrum, bins, terms)
+            np.add.at(spectrum, (n - bins) % n, np.conj(terms))
+            return np.fft.ifft(spectrum).real.astype(self.dtype, copy=False)
+
+        # Be sure to convert sample frequency to time domain
+        # Angles are worked out in double precision whatever the dtype, only the result is cast
+        first_time = np.float64(self._time[0])
+        dt = np.float64(self._time[1]) - first_time
+        omega = components.freq.astype(np.float64) / dt
+        phase = components.phase.astype(np.float64)
+        fourier_series = np.empty(n, dtype=self.dtype)
+        block_rows = max(1, block_elements // max(1, len(components)))
+        for start in range(0, n, block_rows):
+            times = self._time[start:start + block_rows].astype(np.float64) - first_time
+            fourier_series[start:start + block_rows] = \
+                np.cos(np.outer(times, omega) + phase) @ components.mag.astype(np.float64)
+        return fourier_series
+
+    def naive_dft(self, num_samples=64, as_spectrum=False, real=False, bins=None, block_elements=1 << 22):
+        """
+        Naive Discrete Fourier Transform as a DFT matrix product, computed a block of rows at a time
+        Only block_elements matrix entries exist at once, so memory stays bounded for large N
+        :param: num_samples - Number of samples to consider from signal (any length)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - only compute the N//2+1 non-redundant bins of the real signal
+        :param: bins - frequency bins to evaluate (all num_samples bins, or N//2+1 if real, if None)
+        :param: block_elements - maximum number of DFT matrix entries per block
+        :return: list of (amplitude, frequency, phase) tuples, and timing data
+        """
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
 
-        print("num samples = ", num_samples)
-        print(all_components[:6])
+        # Setup num samples is constant, so keep outside timing loop
+        xd = self._signal[:num_samples]
+        n = len(xd)
+        if bins is None:
+            bins = np.arange(n // 2 + 1 if real else n)
+        bins = np.asarray(bins, dtype=np.int64).reshape(-1)
+        block_rows = max(1, block_elements // n)
 
-        # Only get the first N//2 terms to consider (due to symmetry)
-        selected_components = all_components[:len(all_components) // 2]  # create copy
+        start_time = time.perf_counter()  # Grab time when we start FFT calc
+        sample_index = np.arange(n, dtype=np.int64)
+        dft = np.empty(len(bins), dtype=np.result_type(xd.dtype, np.complex64))
+        for start in range(0, len(bins), block_rows):
+            rows = bins[start:start + block_rows]
+            # Reduce k*j modulo n before scaling so large indices don't lose precision
+            angles = (-2.0 * np.pi / n) * (np.outer(rows % n, sample_index) % n)
+            dft[start:start + block_rows] = np.exp(1j * angles).astype(dft.dtype, copy=False) @ xd
+        end_time = time.perf_counter()  # Grab time at end of FFT calc
 
-        # Sort a list of tuples by the first element of each (by default)
-        # reverse so biggest to smallest
-        selected_components.sort(reverse=True)  # Sort list of tuples by first element by default
-        selected_components = selected_components[:num_terms]
-        print(selected_components)
-        return selected_components
+        # This extraction should be constant, so keep outside timing loop
+        spectrum = Spectrum.from_complex(dft, n, bins)
+        return FFT.__result(spectrum, as_spectrum), end_time - start_time
 
-    def naive_dft(self, num_samples=64):
+    def numpy_fft(self, num_samples=64, as_spectrum=False, real=False):
         """
-        Naive Discrete Fourier Transform
-        :param: num_samples - Number of samples to consider from signal (power of 2)
+        fft implementation from Numpy (with timing goodness and consistent data format)
+        :param: num_samples - Number of samples to consider from signal (any length)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - only compute the N//2+1 non-redundant bins of the real signal
         :return: list of (amplitude, frequency, phase) tuples, and timing data
         """
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
+
+        # Setup num samples is constant, so keep outside timing loop
+        xd = self._signal[:num_samples]
 
+        start_time = time.perf_counter()  # Grab time when we start FFT calc
+        complex_val = np.fft.rfft(xd) if real else np.fft.fft(xd)
+        # Numpy before 2.0 always returns complex128, keep complex64 for float32 signals either way
+        complex_val = complex_val.astype(np.result_type(xd.dtype, np.complex64), copy=False)
+        end_time = time.perf_counter() # Grab time at end of FFT calc
 
-        # get rid of pylint warn
-        print(f"Need to overload this with num_samples={num_samples} {len(self._time)}")
-        return None, None  # You need to handle this one!
+        # This extraction should be constant, so keep outside timing loop
+        spectrum = Spectrum.from_complex(complex_val, len(xd))
+        return FFT.__result(spectrum, as_spectrum), end_time-start_time
 
-    def numpy_fft(self, num_samples=64):
+    def iterative_fft(self, num_samples=64, as_spectrum=False, real=False):
         """
-        fft implementation from Numpy (with timing goodness and consistent data format)
+        Iterative in-place radix-2 Cooley-Turkey fft, vectorized over each butterfly stage
+        Bit reversal order and twiddle factors are cached per transform size
         :param: num_samples - Number of samples to consider from signal (power of 2)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - only compute the N//2+1 non-redundant bins of the real signal
         :return: list of (amplitude, frequency, phase) tuples, and timing data
         """
         assert num_samples <= len(self), "Must not request too many samples"
 
         # Setup num samples is constant, so keep outside timing loop
         xd = self._signal[:num_samples]
-        n = len(xd)
         assert FFT.__is_pow2(len(xd))  # This only defined for power of 2 data size
 
-        start_time = time.perf_counter()  # Grab time when we start FFT calc
-        complex_val = np.fft.fft(xd)
+        start_time = time.perf_counter() # Grab time when we start FFT calc
+        rs = FFT.__rfft(xd, FFT.__fft_iterative) if real else FFT.__fft_iterative(xd)
         end_time = time.perf_counter() # Grab time at end of FFT calc
 
         # This extraction should be constant, so keep outside timing loop
-        mag = [abs(c) * 2.0 / n for c in complex_val[:num_samples]]  # Scale according
-        wr = [2*np.pi*r/num_samples for r in range(num_samples)]
-        ph = [cmath.phase(c) for c in complex_val[:num_samples]]
-        ph = [math.atan2(c.imag, c.real) for c in complex_val[:num_samples]]
-        all_components = [(mag[i], wr[i], ph[i]) for i in range(num_samples)]
+        spectrum = Spectrum.from_complex(rs, len(xd))
+        return FFT.__result(spectrum, as_spectrum), end_time-start_time
+
+    def bluestein_fft(self, num_samples=64, as_spectrum=False, real=False):
+        """
+        Bluestein chirp-z fft for any number of samples
+        Rewrites the DFT as a convolution with a chirp, done with power of 2 iterative ffts
+        :param: num_samples - Number of samples to consider from signal (any length)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - return only the N//2+1 non-redundant bins of the real signal
+                       (half the work for even N, odd N still runs the full complex transform)
+        :return: list of (amplitude, frequency, phase) tuples, and timing data
+        """
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
+
+        # Setup num samples is constant, so keep outside timing loop
+        xd = self._signal[:num_samples]
+
+        start_time = time.perf_counter() # Grab time when we start FFT calc
+        rs = FFT.__rfft(xd, FFT.__fft_bluestein) if real else FFT.__fft_bluestein(xd)
+        end_time = time.perf_counter() # Grab time at end of FFT calc
+
+        # This extraction should be constant, so keep outside timing loop
+        spectrum = Spectrum.from_complex(rs, len(xd))
+        return FFT.__result(spectrum, as_spectrum), end_time-start_time
+
+    def parallel_fft(self, num_samples=64, as_spectrum=False, real=False):
+        """
+        Four-step fft of one long signal split over a pool of threads
+        The N = N1 * N2 samples are viewed as an (N2, N1) matrix in shared memory: blocks of
+        columns are transformed and twiddled in parallel, then blocks of rows. Numpy's fft
+        releases the GIL, so the threads really do run on separate cores.
+        Lengths with too few columns to share out (N1 below the number of workers, e.g. a prime N)
+        go through Bluestein's algorithm instead, whose power of 2 transforms always split evenly
+        :param: num_samples - Number of samples to consider from signal (any length)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - return only the N//2+1 non-redundant bins of the real signal
+                       (half the work for even N, odd N still runs the full complex transform)
+        :return: list of (amplitude, frequency, phase) tuples, and timing data
+        """
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
+
+        # Setup num samples is constant, so keep outside timing loop
+        xd = self._signal[:num_samples]
+        workers = self.parallel_workers or os.cpu_count() or 1
+        if num_samples < FFT.PARALLEL_MIN_SAMPLES:
+            workers = 1  # starting threads would take longer than the transform
+
+        start_time = time.perf_counter() # Grab time when we start FFT calc
+        if real:
+            rs = FFT.__rfft(xd, lambda zs: FFT.__fft_parallel(zs, workers))
+        else:
+            rs = FFT.__fft_parallel(xd, workers)
+        end_time = time.perf_counter() # Grab time at end of FFT calc
 
-        return all_components, end_time-start_time
+        # This extraction should be constant, so keep outside timing loop
+        spectrum = Spectrum.from_complex(rs, len(xd))
+        return FFT.__result(spectrum, as_spectrum), end_time-start_time
 
-    def cooley_turkey_fft(self, num_samples=64):
+    def check_backend(self, backend, num_samples=64, real=False):
+        """
+        Compare a backend against numpy_fft on the same samples
+        :param backend: name of transform to check (see FFT.BACKENDS)
+        :param: num_samples - Number of samples to consider from signal
+        :param: real - compare the real input (half spectrum) mode
+        :return: largest absolute difference in magnitude and in (wrapped) phase
+        """
+        assert backend in FFT.BACKENDS, f"Unknown backend {backend}, choose from {list(FFT.BACKENDS)}"
+        expected, _ = self.numpy_fft(num_samples, as_spectrum=True, real=real)
+        actual, _ = getattr(self, FFT.BACKENDS[backend])(num_samples, as_spectrum=True, real=real)
+        assert len(actual) == len(expected), "Backend returned the wrong number of bins"
+
+        # Phase is meaningless for (numerically) empty bins, so only compare where there is signal
+        significant = expected.mag > 1.0e-9 * max(1.0, float(np.max(expected.mag)))
+        phase_error = np.angle(np.exp(1j * (actual.phase - expected.phase)))[significant]
+        return (float(np.max(np.abs(actual.mag - expected.mag))),
+                float(np.max(np.abs(phase_error), initial=0.0)))
+
+    def cooley_turkey_fft(self, num_samples=64, as_spectrum=False, real=False):
         """
         Cooley-Turkey fft implementation
         :param: num_samples - Number of samples to consider from signal (power of 2)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - only compute the N//2+1 non-redundant bins of the real signal
         :return: list of (amplitude, frequency, phase) tuples, and timing data
         """
         assert num_samples <= len(self), "Must not request too many samples"
 
         # Setup num samples is constant, so keep outside timing loop
         xd = self._signal[:num_samples]
-        n = len(xd)
         assert FFT.__is_pow2(len(xd))  # This only defined for power of 2 data size
 
         start_time = time.perf_counter() # Grab time when we start FFT calc
-        rs = FFT.__fft_(xd, len(xd))
+        if real:
+            rs = FFT.__rfft(xd, lambda zs: np.array(FFT.__fft_(zs, len(zs)), dtype=np.complex128))
+        else:
+            rs = FFT.__fft_(xd, len(xd))
 
         end_time = time.perf_counter() # Grab time at end of FFT calc
 
         # This extraction should be constant, so keep outside timing loop
-        mag = [abs(c) * 2.0 / n for c in rs[:num_samples]]  # Scale according to sample period
-        wr = [2*np.pi*r/num_samples for r in range(num_samples)]
-        ph = [cmath.phase(c) for c in rs[:num_samples]]
-        all_components = [(mag[i], wr[i], ph[i]) for i in range(num_samples)]
-
-        return all_components, end_time-start_time
+        spectrum = Spectrum.from_complex(np.array(rs, dtype=np.complex128), len(xd))
+        return FFT.__result(spectrum, as_spectrum), end_time-start_time
 
 
 
-    def simple_dft(self, num_samples=64):
+    def simple_dft(self, num_samples=64, as_spectrum=False, real=False):
         """
         Simple dFT
-        :param: num_samples - Number of samples to consider from signal (power of 2)
+        :param: num_samples - Number of samples to consider from signal (any length)
+        :param: as_spectrum - return a Spectrum instead of the list of tuples
+        :param: real - only compute the N//2+1 non-redundant bins of the real signal
         :return: list of (amplitude, frequency, phase) tuples, and timing data
         """
-        assert num_samples <= len(self), "Must not request too many samples"
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
 
         # Setup num samples is constant, so keep outside timing loop
         xd = self._signal[:num_samples]
         n = len(xd)
-        assert FFT.__is_pow2(len(xd))  # This only defined for power of 2 data size
 
         start_time = time.perf_counter()  # Grab time when we start FFT calc
-        dft2 = [sum((xd[k] * FFT.__iexp(-2*math.pi*i*k/n) for k in range(n))) for i in range(n)]
+        num_bins = n // 2 + 1 if real else n
+        dft2 = [sum((xd[k] * FFT.__iexp(-2*math.pi*i*k/n) for k in range(n))) for i in range(num_bins)]
         end_time = time.perf_counter()  # Grab time at end of FFT calc
 
         # This extraction should be constant, so keep outside timing loop
-        mag  = [abs(c)*2.0/n for c in dft2] # Scale according to sample period
-        ph   = [cmath.phase(c) for c in dft2]
-        wr = [2 * np.pi * r / num_samples for r in range(num_samples)]
-        all_components = [(mag[i], wr[i], ph[i]) for i in range(num_samples)]
+        spectrum = Spectrum.from_complex(np.array(dft2, dtype=np.complex128), n)
+        return FFT.__result(spectrum, as_spectrum), end_time - start_time
 
-        return all_components, end_time - start_time
+    @staticmethod
+    def __result(spectrum, as_spectrum):
+        """
+        Return either the Spectrum or its list of (amplitude, frequency, phase) tuples
+        """
+        return spectrum if as_spectrum else spectrum.to_components()
 
 
     ## The below code works, and is based on
@@ -159,6 +414,157 @@ class FFT:
     def __is_pow2(n):
         return n > 0 and not (n & n-1) # Bitwise check
 
+    @staticmethod
+    @functools.lru_cache(maxsize=CACHED_SIZES)
+    def __twiddles(n):
+        """
+        Bit reversal permutation and twiddle factors exp(-2 pi i k / n), k < n/2, cached per size
+        """
+        bits = n.bit_length() - 1
+        index = np.arange(n)
+        reverse = np.zeros(n, dtype=np.intp)
+        for _ in range(bits):
+            reverse = (reverse << 1) | (index & 1)
+            index >>= 1
+        twiddles = np.exp(-2j * np.pi * np.arange(n // 2) / n)
+        return reverse, twiddles
+
+    @staticmethod
+    def __fft_iterative(xs):
+        """
+        cooley-turkey fft iterative helper method
+        Each stage does all of its butterflies at once on a (blocks, size) view of the data
+        """
+        n = len(xs)
+        reverse, twiddles = FFT.__twiddles(n)
+        rs = np.asarray(xs, dtype=np.complex128)[reverse]  # bit reversed copy, worked on in place
+
+        size = 2
+        while size <= n:
+            hn = size // 2
+            blocks = rs.reshape(-1, size)
+            odd = blocks[:, hn:] * twiddles[::n // size]
+            blocks[:, hn:] = blocks[:, :hn] - odd
+            blocks[:, :hn] += odd
+            size *= 2
+
+        return rs
+
+    @staticmethod
+    @functools.lru_cache(maxsize=CACHED_SIZES)
+    def __chirp(n):
+        """
+        Bluestein chirp exp(-i pi k^2 / n) and the fft of its padded conjugate kernel, cached per size
+        """
+        m = 1 << (2 * n - 2).bit_length()  # power of 2 >= 2n - 1, so the convolution doesn't wrap
+        k = np.arange(n, dtype=np.int64)
+        chirp = np.exp(-1j * np.pi * ((k * k) % (2 * n)) / n)  # reduce k^2 first to keep precision
+
+        kernel = np.zeros(m, dtype=np.complex128)
+        kernel[:n] = np.conj(chirp)
+        kernel[m - n + 1:] = np.conj(chirp[1:][::-1])  # negative lags wrap to the end
+        return chirp, FFT.__fft_iterative(kernel)
+
+    @staticmethod
+    def __fft_bluestein(xs):
+        """
+        bluestein chirp-z fft helper method
+        """
+        n = len(xs)
+        chirp, kernel_fft = FFT.__chirp(n)
+        m = len(kernel_fft)
+
+        padded = np.zeros(m, dtype=np.complex128)
+        padded[:n] = xs * chirp
+        product = FFT.__fft_iterative(padded) * kernel_fft
+
+        # Inverse fft through the forward transform: ifft(x) = conj(fft(conj(x))) / m
+        convolution = np.conj(FFT.__fft_iterative(np.conj(product))) / m
+        return convolution[:n] * chirp
+
+    @staticmethod
+    def __fft_parallel(xs, workers):
+        """
+        parallel fft helper method, four-step if N has enough columns for the workers, otherwise
+        Bluestein with four-step transforms of its power of 2 length
+        """
+        n = len(xs)
+        if workers == 1 or split_length(n)[0] >= workers:
+            return FFT.__fft_four_step(xs, workers)
+
+        chirp, kernel_fft = FFT.__chirp(n)
+        m = len(kernel_fft)
+        padded = np.zeros(m, dtype=np.complex128)
+        padded[:n] = xs * chirp
+        product = FFT.__fft_four_step(padded, workers) * kernel_fft
+        # Inverse fft through the forward transform: ifft(x) = conj(fft(conj(x))) / m
+        convolution = np.conj(FFT.__fft_four_step(np.conj(product), workers)) / m
+        return (convolution[:n] * chirp).astype(np.result_type(xs.dtype, np.complex64), copy=False)
+
+    @staticmethod
+    def __fft_four_step(xs, workers):
+        """
+        four-step fft helper method, bin k2 + N2 * k1 ends up in row k2, column k1
+        """
+        n = len(xs)
+        n1, n2 = split_length(n)
+        matrix = np.asarray(xs).reshape(n2, n1)
+        complex_type = np.result_type(matrix.dtype, np.complex64)
+        columns = np.empty((n2, n1), dtype=complex_type)
+        rows = np.empty((n2, n1), dtype=complex_type)
+
+        def column_block(start, stop):
+            # Length N2 ffts down the columns, then the twiddle exp(-2 pi i n1 k2 / N)
+            k2 = np.arange(n2, dtype=np.int64)[:, None]
+            block = np.fft.fft(matrix[:, start:stop], axis=0)
+            block *= np.exp((-2j * np.pi / n) * ((k2 * np.arange(start, stop)) % n))
+            columns[:, start:stop] = block
+
+        def row_block(start, stop):
+            rows[start:stop] = np.fft.fft(columns[start:stop], axis=1)
+
+        # A few blocks per worker keeps them all busy to the end
+        def blocks(length):
+            edges = np.linspace(0, length, min(length, 4 * workers) + 1).astype(int)
+            return zip(edges[:-1].tolist(), edges[1:].tolist())
+
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as pool:
+                list(pool.map(lambda block: column_block(*block), blocks(n1)))
+                list(pool.map(lambda block: row_block(*block), blocks(n2)))
+        else:
+            column_block(0, n1)
+            row_block(0, n2)
+        return rows.T.reshape(-1)
+
+    @staticmethod
+    def __rfft(xs, complex_fft):
+        """
+        real input fft helper method, bins 0..N/2 from one complex fft of half the size
+        Even samples go in the real part and odd samples in the imaginary part, then get separated
+        Only even N can be packed this way: odd N runs the full size complex fft and is sliced
+        """
+        n = len(xs)
+        if n % 2 or n < 2:
+            return complex_fft(np.asarray(xs, dtype=np.result_type(xs.dtype, np.complex64)))[:n // 2 + 1]
+
+        m = n // 2
+        packed = complex_fft(xs[0::2] + 1j * xs[1::2])
+        k = np.arange(m + 1)
+        zk = packed[k % m]
+        zr = np.conj(packed[(m - k) % m])
+        even = 0.5 * (zk + zr)
+        odd = -0.5j * (zk - zr)
+        return (even + FFT.__real_twiddles(n) * odd).astype(packed.dtype, copy=False)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=CACHED_SIZES)
+    def __real_twiddles(n):
+        """
+        Twiddle factors exp(-2 pi i k / n), k <= n/2, for the real input transforms, cached per size
+        """
+        return np.exp(-2j * np.pi * np.arange(n // 2 + 1) / n)
+
     @staticmethod
     def __fft_(xs, n, start=0, stride=1):
         """
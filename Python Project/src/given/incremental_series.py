@@ -0,0 +1,83 @@
+"""
+A Fourier series that grows or shrinks one term at a time
+
+"""
+import numpy as np
+
+
+class IncrementalSeries:
+    """
+    Keeps the strongest max_terms components of a transform in order, and the series summed
+    from the first num_terms of them. Changing the number of terms only adds or subtracts the
+    terms in between, so no transform or full reconstruction is needed.
+    """
+    def __init__(self, fft, half_spectrum, num_terms=0, fourier_series=None, max_terms=64,
+                 max_cache_bytes=64 * 1024**2, method="auto"):
+        """
+        :param fft: FFT the spectrum came from (supplies the sample times)
+        :param half_spectrum: Spectrum to take the strongest terms from
+        :param num_terms: number of terms fourier_series already holds
+        :param fourier_series: series of the first num_terms terms, synthesized here if None
+                               (or if it holds more than max_terms terms)
+        :param max_terms: most terms that can be selected
+        :param max_cache_bytes: memory allowed for keeping individual term contributions
+        :param method: FFT.reconstruct method for the terms, the same one fourier_series was made
+                       with, so added and subtracted terms match it exactly
+        """
+        self._fft = fft
+        self._method = method
+        self.ranked = half_spectrum.top(max_terms)
+        self._contributions = {}  # rank -> synthesized term, kept while within max_cache_bytes
+        self._max_cached = max(0, max_cache_bytes // max(1, 8 * len(fft)))
+
+        self._num_terms = 0
+        self.fourier_series = np.zeros(len(fft), dtype=np.float64)
+        if fourier_series is not None and num_terms <= len(self.ranked):
+            self._num_terms = num_terms
+            self.fourier_series = fourier_series.copy()
+        else:
+            self.set_terms(num_terms)
+
+    @property
+    def num_terms(self):
+        """
+        Return the number of terms in the current series
+        """
+        return self._num_terms
+
+    def components(self):
+        """
+        Return the Spectrum of the terms in the current series, biggest first
+        """
+        return self.ranked[:self._num_terms]
+
+    def set_terms(self, num_terms):
+        """
+        Add or subtract terms until the series holds the first num_terms of them
+        :param num_terms: wanted number of terms (clipped to 0..max_terms)
+        :return: the updated fourier series
+        """
+        num_terms = max(0, min(num_terms, len(self.ranked)))
+        if num_terms == 0:
+            self.fourier_series[:] = 0.0  # also clears any rounding left from earlier updates
+        elif abs(num_terms - self._num_terms) > num_terms:
+            # Summing the wanted terms afresh is cheaper than stepping through more terms than that
+            self.fourier_series[:] = self._fft.reconstruct(self.ranked[:num_terms], method=self._method)
+        else:
+            for rank in range(self._num_terms, num_terms):
+                self.fourier_series += self.__term(rank)
+            for rank in range(num_terms, self._num_terms):
+                self.fourier_series -= self.__term(rank)
+        self._num_terms = num_terms
+        return self.fourier_series
+
+    def __term(self, rank):
+        """
+        Synthesized contribution of one ranked term
+        """
+        contribution = self._contributions.get(rank)
+        if contribution is None:
+            contribution = self._fft.reconstruct(self.ranked[rank:rank + 1], method=self._method)
+            if len(self._contributions) < self._max_cached:
+                self._contributions[rank] = contribution
+        return contribution
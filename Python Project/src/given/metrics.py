@@ -0,0 +1,122 @@
+"""
+Per-stage timing and size metrics for the read, transform, spectrum (magnitudes and phases),
+extraction (top components), reconstruction and render stages
+
+Nothing is recorded (or printed) unless metrics are enabled or a hook is added:
+
+    from given.metrics import metrics
+    metrics.enable()
+    ...                       # read files, run FFTs, reconstruct
+    metrics.to_json("metrics.json")
+"""
+import json
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    Registry of timed stage records, each a dict with 'stage', 'seconds' and any counts
+    such as 'samples' or 'bytes'. Hooks are called with every record as it is made.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.hooks = []
+
+    def enable(self):
+        """
+        Start keeping records
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop keeping records (hooks are still called)
+        """
+        self.enabled = False
+
+    @property
+    def active(self):
+        """
+        Return whether anything would see a record
+        """
+        return self.enabled or bool(self.hooks)
+
+    def add_hook(self, hook):
+        """
+        Call hook(record) for every record made from now on
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Stop calling a hook added with add_hook
+        """
+        self.hooks.remove(hook)
+
+    def record(self, stage, seconds, **counts):
+        """
+        Record one stage duration with optional counts
+        """
+        if not self.active:
+            return
+        entry = {"stage": stage, "seconds": seconds, **counts}
+        if self.enabled:
+            self.records.append(entry)
+        for hook in self.hooks:
+            hook(entry)
+
+    @contextmanager
+    def stage(self, stage, **counts):
+        """
+        Time the body of a with block as one stage
+        Yields a dict the body can add counts to once it knows them (e.g. samples read)
+        """
+        info = dict(counts)
+        if not self.active:
+            yield info
+            return
+        start_time = time.perf_counter()
+        yield info
+        self.record(stage, time.perf_counter() - start_time, **info)
+
+    def summary(self):
+        """
+        Totals per stage: number of records, total/min/max seconds and summed numeric counts
+        """
+        stages = {}
+        for entry in self.records:
+            total = stages.setdefault(entry["stage"], {"count": 0, "seconds": 0.0,
+                                                       "min_seconds": float("inf"), "max_seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += entry["seconds"]
+            total["min_seconds"] = min(total["min_seconds"], entry["seconds"])
+            total["max_seconds"] = max(total["max_seconds"], entry["seconds"])
+            for key, value in entry.items():
+                if key not in ("stage", "seconds") and isinstance(value, (int, float)) \
+                        and not isinstance(value, bool):
+                    total[key] = total.get(key, 0) + value
+        return stages
+
+    def to_json(self, file_path=None):
+        """
+        Export the summary and every record as json
+        :param file_path: file to write, or None to just return the text
+        :return: json text
+        """
+        text = json.dumps({"summary": self.summary(), "records": self.records}, indent=2, default=float)
+        if file_path is not None:
+            with open(file_path, "wt") as fout:
+                fout.write(text)
+        return text
+
+    def clear(self):
+        """
+        Drop all records
+        """
+        self.records = []
+
+
+# Shared registry used by the library
+metrics = Metrics()
@@ -0,0 +1,121 @@
+"""
+Fourier Transform of many channels sampled at the same times, in one vectorized call
+
+"""
+import time
+import numpy as np
+
+from given.fft import FFT
+from given.metrics import metrics
+from given.spectrum import Spectrum
+
+
+class MultiChannelFFT:
+    """
+    Batched sibling of FFT for a (channels, samples) array
+    Every channel is transformed by one rfft call and selected by one partial selection,
+    so there is no per-channel Python work however many channels there are
+    """
+    def __init__(self, sample_times=None, signals=None):
+        # Use assert to limit allowable data types
+        assert isinstance(sample_times, np.ndarray), "Only Numpy arrays allowed for time"
+        assert isinstance(signals, np.ndarray), "Only Numpy arrays allowed for signals"
+        assert len(sample_times.shape)==1, "Only 1D time arrays allowed"
+        assert len(signals.shape)==2, "Only 2D (channels, samples) signal arrays allowed"
+        assert sample_times.dtype in FFT.DTYPES, "Only single (float32) or double precision (float64) allowed"
+        assert signals.dtype in FFT.DTYPES, "Only single (float32) or double precision (float64) allowed"
+        assert sample_times.shape[0] == signals.shape[1], "time and each channel must be same length"
+
+        self._time = sample_times
+        self._signals = signals
+
+    def __len__(self):
+        """
+        Return the number of samples per channel
+        """
+        return self._time.shape[0]
+
+    @property
+    def num_channels(self):
+        """
+        Return the number of channels
+        """
+        return self._signals.shape[0]
+
+    def channel(self, index):
+        """
+        Return a single channel as an FFT, for the backends and methods only FFT has
+        """
+        return FFT(self._time, self._signals[index])
+
+    def get_fourier_components(self, num_terms=6, num_samples=None):
+        """
+        Get the most significant components of every channel
+        :return: list per channel of (amplitude, frequency, phase) tuples, biggest first
+        """
+        spectrum = self.get_spectrum(num_terms, num_samples)
+        return [spectrum[index].to_components() for index in range(self.num_channels)]
+
+    def get_spectrum(self, num_terms=6, num_samples=None):
+        """
+        Get the most significant components of every channel
+        :param num_terms: Number of terms to keep per channel
+        :param num_samples: Number of samples to transform (see get_half_spectrum)
+        :return: 2D Spectrum of (channels, num_terms) arrays, each row biggest first
+        """
+        half_spectrum = self.get_half_spectrum(num_samples)
+        with metrics.stage("extraction", samples=half_spectrum.mag.size, terms=num_terms,
+                           channels=self.num_channels):
+            return half_spectrum.top(num_terms)
+
+    def get_half_spectrum(self, num_samples=None):
+        """
+        Get the non-redundant half of the Fourier Transform of every channel, in bin order
+        :param num_samples: Number of samples to transform from each channel, defaults to all
+        :return: 2D Spectrum of (channels, (N+1)//2) arrays
+        """
+        num_samples = len(self) if num_samples is None else num_samples
+        assert 0 < num_samples <= len(self), "Must not request too many samples"
+
+        start_time = time.perf_counter()
+        complex_val = np.fft.rfft(self._signals[:, :num_samples], axis=-1)
+        complex_val = complex_val.astype(np.result_type(self._signals.dtype, np.complex64), copy=False)
+        transform_time = time.perf_counter() - start_time
+
+        # Only keep the first (N+1)//2 bins (due to symmetry, and skipping Nyquist)
+        spectrum = Spectrum.from_complex(complex_val[:, :(num_samples + 1) // 2], num_samples)
+        if metrics.active:
+            metrics.record("transform", transform_time, backend="numpy", samples=num_samples,
+                           channels=self.num_channels)
+            metrics.record("spectrum", time.perf_counter() - start_time - transform_time,
+                           samples=num_samples, channels=self.num_channels)
+        return spectrum
+
+    def reconstruct(self, spectrum):
+        """
+        Synthesize the Fourier series of every channel from a 2D Spectrum such as get_spectrum returns
+        Terms on the bins of the whole signal are inverse transformed together (sample times are
+        taken as exactly uniform), otherwise each channel is summed as FFT.reconstruct does
+        :return: reconstructed signals, (channels, samples)
+        """
+        assert spectrum.mag.shape[0] == self.num_channels, "Need one row of terms per channel"
+        n = len(self)
+        with metrics.stage("reconstruction", samples=n, terms=spectrum.mag.shape[-1],
+                           channels=self.num_channels):
+            bins = spectrum.freq * n / (2.0 * np.pi)
+            if not np.all(np.abs(bins - np.round(bins)) < 1.0e-6):
+                return np.stack([self.channel(index).reconstruct(spectrum[index], method="blocked")
+                                 for index in range(self.num_channels)])
+
+            bins = np.round(bins).astype(np.int64) % n
+            mirrored = 2 * bins > n  # upper half bins are the conjugates of bin n - k
+            bins = np.where(mirrored, n - bins, bins)
+            # irfft counts bin 0 (and Nyquist) once, keeping only the real part, and every other bin twice
+            scale = np.where((bins == 0) | (2 * bins == n), n, 0.5 * n)
+            terms = spectrum.mag * scale * np.exp(1j * spectrum.phase)
+            terms = np.where(mirrored, np.conj(terms), terms)
+
+            half = np.zeros((self.num_channels, n // 2 + 1), dtype=np.result_type(self._signals.dtype, np.complex64))
+            rows = np.broadcast_to(np.arange(self.num_channels)[:, None], bins.shape)
+            np.add.at(half, (rows, bins), terms)
+            return np.fft.irfft(half, n, axis=-1).astype(self._signals.dtype, copy=False)
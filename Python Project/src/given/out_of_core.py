@@ -0,0 +1,195 @@
+"""
+Fourier Transform of .dat recordings too big to hold in memory
+
+A four-step FFT treats the N = N1 * N2 samples as an (N2, N1) matrix: column FFTs, a twiddle,
+then row FFTs. Columns are read a block at a time straight from the memory-mapped file into
+a scratch file, rows are read back a block at a time and their bins go directly into the
+running top-k selection, so memory stays within a fixed budget whatever the file size.
+
+Lengths whose best split is still too unbalanced for the budget (e.g. a large prime) use
+Bluestein's algorithm: the DFT becomes a convolution with a chirp, done with power of 2
+four-step FFTs of at least 2N - 1 samples through scratch files on disk.
+"""
+import os
+import tempfile
+import time
+import numpy as np
+
+from given.fft import split_length
+from given.metrics import metrics
+from given.readers import read_binary_records
+from given.spectrum import Spectrum
+
+
+class OutOfCoreFFT:
+    """
+    Counterpart of FFT for a .dat file, reading it through a memory map instead of arrays
+    """
+    # Bytes of working memory per complex matrix element (input, transform and temporaries)
+    BYTES_PER_ELEMENT = 64
+
+    def __init__(self, file_path, format_string=None, memory_bytes=256 * 1024**2, scratch_dir=None):
+        """
+        :param file_path: path to .dat file
+        :param format_string: '<iid' or '>iid', detected from the data if None
+        :param memory_bytes: working memory allowed for blocks of the transform
+        :param scratch_dir: folder for the scratch file (the system temp folder if None)
+        """
+        self._records = read_binary_records(file_path, format_string)
+        self.memory_bytes = memory_bytes
+        self.scratch_dir = scratch_dir
+
+    def __len__(self):
+        """
+        Return the number of samples in the file
+        """
+        return len(self._records)
+
+    @property
+    def sample_interval(self):
+        """
+        Return the time between the first two samples (the dt FFT users take from time[1] - time[0])
+        """
+        first, second = self._records[0], self._records[1]
+        return (float(second["seconds"]) - float(first["seconds"])) \
+            + 1.0e-9 * (float(second["nanoseconds"]) - float(first["nanoseconds"]))
+
+    def get_fourier_components(self, num_terms=6, num_samples=None):
+        """
+        Get the most significant components from Fourier Transform
+        :return: list of (amplitude, frequency, phase) tuples, biggest first
+        """
+        return self.get_spectrum(num_terms, num_samples).to_components()
+
+    def get_spectrum(self, num_terms=6, num_samples=None):
+        """
+        Get the most significant components of the half spectrum
+        :param num_terms: Number of terms to consider
+        :param num_samples: Number of samples to transform, defaults to the whole file (as
+                            FFT.get_spectrum does). Lengths with a factor near their square root
+                            are transformed directly, others by Bluestein's algorithm at two to
+                            three times the time and four to eight times the scratch space
+        :return: Spectrum ordered from biggest to smallest magnitude, frequencies in radians per sample
+        """
+        n = len(self) if num_samples is None else num_samples
+        assert 0 < n <= len(self), "Must not request too many samples"
+        signal = self._records["signal"][:n]  # view into the file, nothing read yet
+        n1, n2 = split_length(n)
+
+        with tempfile.TemporaryDirectory(dir=self.scratch_dir) as folder_name:
+            start_time = time.perf_counter()
+            # Whole columns and whole rows must fit in the budget
+            if max(n1, n2) * self.BYTES_PER_ELEMENT <= self.memory_bytes:
+                scratch = self.__scratch(folder_name, "columns.bin", (n2, n1))
+                self.__column_pass(signal.reshape(n2, n1), scratch, n)
+                selected, extraction_time = self.__row_pass(scratch, n, num_terms)
+                del scratch  # release the map before the folder is removed
+            else:
+                selected, extraction_time = self.__bluestein(signal, folder_name, num_terms)
+            transform_time = time.perf_counter() - start_time - extraction_time
+
+        if metrics.active:
+            metrics.record("transform", transform_time, backend="out_of_core", samples=n, bytes=16 * n)
+            metrics.record("extraction", extraction_time, samples=(n + 1) // 2, terms=num_terms)
+        return selected
+
+    @staticmethod
+    def __scratch(folder_name, file_name, shape):
+        """
+        Return a complex scratch matrix backed by a file in folder_name
+        """
+        return np.memmap(os.path.join(folder_name, file_name), dtype=np.complex128, mode="w+", shape=shape)
+
+    def __bluestein(self, signal, folder_name, num_terms):
+        """
+        Bluestein's algorithm with w_j = exp(i pi j^2 / N): X_k = conj(w_k) * sum_j x_j conj(w_j) w_(k-j)
+        The convolution is circular over M >= 2N - 1 (a power of 2, so it always splits evenly)
+        :return: selected Spectrum and seconds spent selecting
+        """
+        n = len(signal)
+        m = 1 << (2 * n - 2).bit_length()
+        m1, m2 = split_length(m)
+        assert max(m1, m2) * self.BYTES_PER_ELEMENT <= self.memory_bytes, \
+            f"{n} samples need {m1} x {m2} blocks for Bluestein, too big for the memory budget"
+
+        def chirp(index):
+            # Reduce j^2 modulo 2N in integers so the angle stays accurate for large N
+            return np.exp((1j * np.pi / n) * ((index * index) % (2 * n)))
+
+        padded = self.__scratch(folder_name, "signal.bin", (m2, m1))
+        kernel = self.__scratch(folder_name, "kernel.bin", (m2, m1))
+        block_rows = max(1, self.memory_bytes // (self.BYTES_PER_ELEMENT * m1))
+        for start in range(0, m2, block_rows):
+            index = np.arange(start * m1, min(m2, start + block_rows) * m1, dtype=np.int64)
+            # x_j conj(w_j), zero padded to M
+            values = np.zeros(len(index), dtype=np.complex128)
+            inside = index[index < n]
+            values[:len(inside)] = signal[inside[0]:inside[-1] + 1] * np.conj(chirp(inside)) \
+                if len(inside) else 0.0
+            padded[start:start + block_rows] = values.reshape(-1, m1)
+            # w_j for |j| < N, negative j wrapped round to the end
+            lag = np.minimum(index, m - index)
+            kernel[start:start + block_rows] = np.where(lag < n, chirp(lag), 0.0).reshape(-1, m1)
+
+        for matrix in (padded, kernel):
+            self.__column_pass(matrix, matrix, m)
+            for start in range(0, m2, block_rows):
+                matrix[start:start + block_rows] = np.fft.fft(matrix[start:start + block_rows], axis=1)
+            matrix.flush()
+
+        # Inverse transform of the product as conj(fft(conj(.))) / M. Both transforms leave bin
+        # k2 + M2 * k1 at row k2, column k1, so the transposed product is in natural order
+        for start in range(0, m2, block_rows):
+            padded[start:start + block_rows] = np.conj(padded[start:start + block_rows]
+                                                       * kernel[start:start + block_rows])
+        del kernel
+        product = padded.T
+        self.__column_pass(product, product, m)
+        return self.__row_pass(product, n, num_terms,
+                               lambda values, bins: np.conj(values) * np.conj(chirp(bins)) / m)
+
+    def __column_pass(self, matrix, scratch, n):
+        """
+        Steps 1 and 2: FFT every column (length N2) and multiply by the twiddle exp(-2 pi i n1 k2 / N)
+        scratch may be matrix itself, each block of columns is read before it is overwritten
+        """
+        n2, n1 = matrix.shape
+        block_columns = max(1, self.memory_bytes // (self.BYTES_PER_ELEMENT * n2))
+        k2 = np.arange(n2, dtype=np.int64)[:, None]
+        for start in range(0, n1, block_columns):
+            columns = np.arange(start, min(n1, start + block_columns), dtype=np.int64)
+            block = np.fft.fft(matrix[:, start:start + block_columns], axis=0)
+            # Reduce the exponent modulo N in integers so the angle stays accurate for large N
+            block *= np.exp((-2j * np.pi / n) * ((k2 * columns) % n))
+            scratch[:, start:start + block_columns] = block
+        scratch.flush()
+
+    def __row_pass(self, scratch, n, num_terms, finish=None):
+        """
+        Steps 3 and 4: FFT every row (length N1), bin k2 + N2 * k1 is row k2, column k1.
+        Only the first (N+1)//2 bins are kept, and each block of rows is merged into the top num_terms
+        :param n: length of the signal, for the kept bins and the scaling (the transform may be longer)
+        :param finish: finish(values, bins) turns the transform into the signal's bins (for Bluestein)
+        :return: selected Spectrum and seconds spent selecting
+        """
+        n2, n1 = scratch.shape
+        num_bins = (n + 1) // 2
+        num_k1 = min(n1, -(-num_bins // n2))  # columns of the row transform that hold kept bins
+        block_rows = max(1, self.memory_bytes // (self.BYTES_PER_ELEMENT * n1))
+
+        selected = Spectrum(np.zeros(0), np.zeros(0), np.zeros(0))
+        extraction_time = 0.0
+        for start in range(0, n2, block_rows):
+            block = np.fft.fft(scratch[start:start + block_rows], axis=1)[:, :num_k1]
+            bins = np.arange(start, start + len(block))[:, None] + n2 * np.arange(num_k1)
+            keep = bins < num_bins
+            values, bins = block[keep], bins[keep]
+            if finish is not None:
+                values = finish(values, bins)
+
+            start_time = time.perf_counter()
+            candidates = Spectrum.from_complex(values, n, bins).top(num_terms)
+            selected = Spectrum(*(np.concatenate((getattr(selected, name), getattr(candidates, name)))
+                                  for name in ("mag", "freq", "phase"))).top(num_terms)
+            extraction_time += time.perf_counter() - start_time
+        return selected, extraction_time
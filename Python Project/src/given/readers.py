@@ -0,0 +1,217 @@
+"""
+Readers for .dat, .csv and .sig signal files
+
+Only needs Numpy, so headless tools can import it without matplotlib or tkinter.
+"""
+import io
+import os
+
+import numpy as np
+
+from given.container import read_container
+from given.metrics import metrics
+
+
+# Record layouts written by signal_data.write_data_as_binary (byte order is chosen at random)
+BINARY_FORMATS = {
+    "<iid": np.dtype([("seconds", "<i4"), ("nanoseconds", "<i4"), ("signal", "<f8")]),
+    ">iid": np.dtype([("seconds", ">i4"), ("nanoseconds", ">i4"), ("signal", ">f8")]),
+}
+
+
+def detect_binary_format(file_path, num_probe=1024):
+    """
+    Detect whether a binary signal file was written as '<iid' or '>iid'
+    :param file_path: path to .dat file
+    :param num_probe: number of leading records to inspect
+    :return: format string, either '<iid' or '>iid'
+    """
+    with open(file_path, "rb") as fin:
+        return detect_buffer_format(fin.read(num_probe * BINARY_FORMATS["<iid"].itemsize))
+
+
+def detect_buffer_format(data):
+    """
+    Detect whether raw (seconds, nanoseconds, signal) records are '<iid' or '>iid'
+    Scores the records under each byte order by how plausible they look
+    (nanoseconds in range, non-decreasing seconds, sane finite signal values)
+    :param data: bytes holding whole records from the start of a file or stream
+    :return: format string, either '<iid' or '>iid'
+    """
+    best_format, best_score = None, -1.0
+    for format_string, dtype in BINARY_FORMATS.items():
+        records = np.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+        if len(records) == 0:
+            continue
+
+        seconds = records["seconds"].astype(np.int64)
+        nanoseconds = records["nanoseconds"]
+        with np.errstate(invalid="ignore", over="ignore"):
+            signal = np.abs(records["signal"].astype(np.float64))
+            score = (np.mean((nanoseconds >= 0) & (nanoseconds < 1_000_000_000))
+                     + np.mean(np.isfinite(signal) & (signal < 1.0e30))
+                     + (np.mean(np.diff(seconds) >= 0) if len(seconds) > 1 else 1.0))
+        if score > best_score:
+            best_format, best_score = format_string, score
+
+    assert best_format is not None, "Binary file contains no complete records"
+    return best_format
+
+
+def read_record_stream(stream, format_string=None, chunk_records=1024, num_probe=1024):
+    """
+    Read (seconds, nanoseconds, signal) records from a pipe, socket or file as they arrive
+    :param stream: binary file object, such as sys.stdin.buffer or socket.makefile("rb")
+    :param format_string: '<iid' or '>iid', detected from the first num_probe records if None
+    :param chunk_records: most records read per chunk
+    :param num_probe: records to wait for before detecting the byte order (a few records
+                      can look plausible either way), fewer only if the stream ends first
+    :return: generator of structured record arrays, like read_binary_records returns
+    """
+    record_size = BINARY_FORMATS["<iid"].itemsize
+    pending = b""
+    while True:
+        # Pipes and sockets return whatever has arrived, so only hand on whole records
+        block = stream.read1(chunk_records * record_size) if hasattr(stream, "read1") \
+            else stream.read(chunk_records * record_size)
+        if block:
+            pending += block
+        usable = len(pending) - len(pending) % record_size
+        if format_string is None:
+            if block and usable < num_probe * record_size:
+                continue
+            if usable == 0:
+                break
+            format_string = detect_buffer_format(pending[:usable])
+        assert format_string in BINARY_FORMATS, f"Unknown binary format {format_string}"
+        if usable:
+            yield np.frombuffer(pending[:usable], dtype=BINARY_FORMATS[format_string])
+            pending = pending[usable:]
+        if not block:
+            break
+
+
+def read_binary_records(file_path, format_string=None):
+    """
+    Memory-map a binary signal file as a structured record array (no parsing, no copy)
+    :param file_path: path to .dat file
+    :param format_string: '<iid' or '>iid', detected from the data if None
+    :return: read-only np.memmap with 'seconds', 'nanoseconds' and 'signal' fields
+    """
+    if format_string is None:
+        format_string = detect_binary_format(file_path)
+    assert format_string in BINARY_FORMATS, f"Unknown binary format {format_string}"
+
+    dtype = BINARY_FORMATS[format_string]
+    num_records = os.path.getsize(file_path) // dtype.itemsize  # ignore any trailing partial record
+    assert num_records > 0, "Binary file contains no complete records"
+    return np.memmap(file_path, dtype=dtype, mode="r", shape=(num_records,))
+
+
+def records_to_arrays(records, first_second=None, dtype=np.float64):
+    """
+    Convert structured (seconds, nanoseconds, signal) records to native arrays
+    :param records: structured array or memmap from read_binary_records
+    :param first_second: whole second that time is measured from (first record's if None)
+    :param dtype: np.float64, or np.float32 to halve the memory of the signal (see the README for
+                  accuracy). Time stays float64, float32 can't resolve the samples of long recordings
+    :return: time relative to first_second (float64), and signal (dtype)
+    """
+    seconds = records["seconds"].astype(np.float64)
+    if first_second is None:
+        first_second = seconds[0]
+    time = (seconds - first_second) + 1.0e-9 * records["nanoseconds"].astype(np.float64)
+    return time, records["signal"].astype(dtype)
+
+
+def read_binary(file_path, format_string=None, dtype=np.float64):
+    """
+    Read a binary signal file in one shot using a structured dtype
+    :param file_path: path to .dat file
+    :param format_string: '<iid' or '>iid', detected from the data if None
+    :param dtype: np.float64, or np.float32 for a single precision signal (time stays float64)
+    :return: time (float64) and signal (dtype) arrays
+    """
+    with metrics.stage("read", file=file_path, format="dat") as info:
+        records = read_binary_records(file_path, format_string)
+        info.update(samples=len(records), bytes=records.nbytes)
+        return records_to_arrays(records, dtype=dtype)
+
+
+def _count_lines(file_path, block_size=1 << 24):
+    """
+    Count the lines in a text file by scanning raw blocks for newlines
+    """
+    num_lines, last_block = 0, b""
+    with open(file_path, "rb") as fin:
+        for block in iter(lambda: fin.read(block_size), b""):
+            num_lines += block.count(b"\n")
+            last_block = block
+    if last_block and not last_block.endswith(b"\n"):
+        num_lines += 1  # final row without a trailing newline
+    return num_lines
+
+
+def read_csv(file_path, chunk_bytes=1 << 24, dtype=np.float64):
+    """
+    Read a seconds,nanoseconds,value csv file in fixed-size chunks into preallocated arrays
+    Peak memory is the two output arrays plus one chunk of text
+    :param file_path: path to .csv file
+    :param chunk_bytes: approximate number of bytes parsed per chunk
+    :param dtype: np.float64, or np.float32 for a single precision signal (time stays float64)
+    :return: time (float64) and signal (dtype) arrays
+    """
+    with metrics.stage("read", file=file_path, format="csv") as info:
+        time, signal = _read_csv_rows(file_path, chunk_bytes, dtype)
+        info.update(samples=len(signal), bytes=os.path.getsize(file_path))
+    return time, signal
+
+
+def _read_csv_rows(file_path, chunk_bytes, dtype):
+    """
+    Parsing loop of read_csv, timed there
+    """
+    num_rows = _count_lines(file_path)
+    time = np.empty(num_rows, dtype=np.float64)
+    signal = np.empty(num_rows, dtype=dtype)
+
+    first_second = None
+    row = 0
+    remainder = b""
+    with open(file_path, "rb") as fin:
+        while True:
+            block = fin.read(chunk_bytes)
+            text = remainder + block
+            if block:
+                # Only parse complete lines, carry the partial last line into the next chunk
+                cut = text.rfind(b"\n") + 1
+                text, remainder = text[:cut], text[cut:]
+            if text.strip():
+                rows = np.loadtxt(io.BytesIO(text), delimiter=",", dtype=np.float64, ndmin=2)
+                if first_second is None:
+                    first_second = rows[0, 0]
+                n = rows.shape[0]
+                time[row:row + n] = (rows[:, 0] - first_second) + 1.0e-9 * rows[:, 1]
+                signal[row:row + n] = rows[:, 2]
+                row += n
+            if not block:
+                break
+
+    assert row > 0, "CSV file contains no rows"
+    return time[:row], signal[:row]
+
+
+def read_signal(file_path, dtype=np.float64):
+    """
+    Read a .dat, .csv or .sig signal file, picking the reader from the extension
+    :param file_path: path to signal file
+    :param dtype: np.float64, or np.float32 for a single precision signal (time stays float64)
+    :return: time (float64) and signal (dtype) arrays
+    """
+    if file_path[-3:] == "dat":
+        return read_binary(file_path, dtype=dtype)
+    if file_path[-3:] == "csv":
+        return read_csv(file_path, dtype=dtype)
+    if file_path[-3:] == "sig":
+        return read_container(file_path, dtype=dtype)
+    raise TypeError("Invalid file!")
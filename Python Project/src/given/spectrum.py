@@ -0,0 +1,80 @@
+"""
+Array backed container for Fourier Transform results
+
+"""
+import numpy as np
+
+
+class Spectrum:
+    """
+    Magnitude, frequency and phase of spectrum bins held as parallel Numpy arrays
+    Frequencies are in radians per sample (divide by the sample period for time domain)
+    The arrays may also be 2D (channels, bins), one row per channel; bins are always the last axis
+    and spectrum[c] is the Spectrum of channel c
+    """
+    def __init__(self, mag, freq, phase):
+        assert mag.shape == freq.shape == phase.shape, "mag, freq and phase must be same shape"
+        self.mag = mag
+        self.freq = freq
+        self.phase = phase
+
+    @classmethod
+    def from_complex(cls, values, num_samples=None, bins=None):
+        """
+        Build a spectrum from complex transform output
+        :param values: complex bins (last axis), optionally one row per channel
+        :param num_samples: length of the transformed signal (defaults to the number of bins)
+        :param bins: bin index of each value (defaults to 0, 1, 2, ...)
+        :return: Spectrum with magnitudes scaled by 2/N
+        """
+        values = np.asarray(values)
+        n = values.shape[-1] if num_samples is None else num_samples
+        bins = np.arange(values.shape[-1]) if bins is None else np.asarray(bins)
+        mag = np.abs(values) * (2.0 / n)  # Scale according to sample period
+        # Channels share one row of frequencies. These stay double precision even for complex64 values,
+        # float32 can't tell the high bins apart (reconstruct needs to recognise terms on bins)
+        freq = np.broadcast_to((2.0 * np.pi / n) * bins, values.shape)
+        phase = np.angle(values)
+        return cls(mag, freq, phase)
+
+    def __len__(self):
+        """
+        Return the number of bins (or of channels for a 2D spectrum)
+        """
+        return self.mag.shape[0]
+
+    def __getitem__(self, index):
+        """
+        Slice or fancy-index all three arrays together
+        """
+        return Spectrum(self.mag[index], self.freq[index], self.phase[index])
+
+    def top(self, num_terms):
+        """
+        Select the largest magnitude bins with a partial selection instead of a full sort
+        A 2D spectrum selects num_terms bins from every channel at once
+        :param num_terms: number of bins to keep
+        :return: Spectrum ordered from biggest to smallest magnitude
+        """
+        num_bins = self.mag.shape[-1]
+        num_terms = min(num_terms, num_bins)
+        if num_terms <= 0:
+            return self[..., :0]
+
+        if num_terms < num_bins:
+            selected = np.argpartition(self.mag, num_bins - num_terms, axis=-1)[..., num_bins - num_terms:]
+        else:
+            selected = np.broadcast_to(np.arange(num_bins), self.mag.shape)
+
+        # Order by magnitude then frequency, biggest first (same as sorting the tuples in reverse)
+        order = np.lexsort((-np.take_along_axis(self.freq, selected, -1),
+                            -np.take_along_axis(self.mag, selected, -1)), axis=-1)
+        selected = np.take_along_axis(selected, order, -1)
+        return Spectrum(*(np.take_along_axis(values, selected, -1)
+                          for values in (self.mag, self.freq, self.phase)))
+
+    def to_components(self):
+        """
+        View the spectrum as the classic list of (amplitude, frequency, phase) tuples
+        """
+        return list(zip(self.mag.tolist(), self.freq.tolist(), self.phase.tolist()))
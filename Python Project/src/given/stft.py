@@ -0,0 +1,53 @@
+"""
+Streaming short-time Fourier Transform over memory-mapped binary recordings
+
+"""
+import numpy as np
+
+from given.readers import read_binary_records, records_to_arrays
+from given.fft import FFT
+
+
+def stft(file_path, window_size=1024, hop_size=None, num_terms=None, backend="numpy",
+         taper=None, format_string=None):
+    """
+    Step a window over a .dat recording and transform one window at a time
+    Only one window of samples is copied out of the memory map at once, so memory
+    depends on window_size and not on the length of the recording
+    :param file_path: path to .dat file
+    :param window_size: number of samples per window
+    :param hop_size: samples between window starts (window_size // 2 if None, so windows overlap by half)
+    :param num_terms: yield the top num_terms components per window, or the whole half spectrum if None
+    :param backend: name of transform to use (see FFT.BACKENDS)
+    :param taper: optional window function such as np.hanning, applied to each window
+    :param format_string: '<iid' or '>iid', detected from the data if None
+    :return: generator of (window start time, Spectrum) pairs, frequencies in radians per sample
+    """
+    hop_size = window_size // 2 if hop_size is None else hop_size
+    assert window_size > 0 and hop_size > 0, "Window and hop size must be positive"
+
+    records = read_binary_records(file_path, format_string)
+    assert len(records) >= window_size, "Recording is shorter than one window"
+
+    first_second = float(records[0]["seconds"])
+    weights = None
+    if taper is not None:
+        weights = taper(window_size)
+        weights = weights * (window_size / np.sum(weights))  # keep magnitudes comparable to no taper
+
+    for start in range(0, len(records) - window_size + 1, hop_size):
+        time, signal = records_to_arrays(records[start:start + window_size], first_second)
+        if weights is not None:
+            signal *= weights
+
+        half_spectrum = FFT(time, signal).get_half_spectrum(backend, window_size)
+        yield time[0], half_spectrum if num_terms is None else half_spectrum.top(num_terms)
+
+
+def magnitude_frames(file_path, window_size=1024, hop_size=None, **kwargs):
+    """
+    Stream the magnitude of each window's half spectrum (a spectrogram one column at a time)
+    :return: generator of (window start time, magnitude array) pairs
+    """
+    for start_time, spectrum in stft(file_path, window_size, hop_size, **kwargs):
+        yield start_time, spectrum.mag
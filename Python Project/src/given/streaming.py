@@ -0,0 +1,211 @@
+"""
+Live spectrum of the latest samples of a signal, updated one sample at a time
+
+Replay an existing recording through a pipe, or over a local socket, with:
+
+    cat ../data/noisy_signal_7.dat | python -m given.streaming --window 256
+    python -m given.streaming --port 5005 --window 256     (then send records to localhost:5005)
+"""
+import argparse
+import socket
+import sys
+
+import numpy as np
+
+from given.readers import read_record_stream
+from given.spectrum import Spectrum
+
+
+class SlidingDFT:
+    """
+    Sliding DFT of the last window_size samples
+    Each new sample updates the (N+1)//2 non-redundant bins in O(N), instead of an
+    O(N log N) transform per sample. The top components are selected on demand and kept
+    until the next sample arrives.
+    """
+    def __init__(self, window_size=1024, num_terms=6, resync_interval=None):
+        """
+        :param window_size: number of latest samples the spectrum covers
+        :param num_terms: number of components top() selects
+        :param resync_interval: samples between exact transforms of the window, which stop
+                                rounding errors building up (window_size if None)
+        """
+        assert window_size > 1, "Window must hold at least 2 samples"
+        self.window_size = window_size
+        self.num_terms = num_terms
+        self._resync_interval = window_size if resync_interval is None else resync_interval
+
+        num_bins = (window_size + 1) // 2  # skip Nyquist, as FFT.get_half_spectrum does
+        self._twiddle = np.exp(2j * np.pi * np.arange(num_bins) / window_size)
+        self._dft = np.zeros(num_bins, dtype=np.complex128)
+        self._values = np.zeros(window_size, dtype=np.float64)  # ring buffers, oldest at self._oldest
+        self._times = np.zeros(window_size, dtype=np.float64)
+        self._oldest = 0
+        self._count = 0
+        self._since_resync = 0
+        self._top = None
+
+    @property
+    def ready(self):
+        """
+        Return whether a whole window of samples has arrived (before that the window is zero padded)
+        """
+        return self._count >= self.window_size
+
+    @property
+    def count(self):
+        """
+        Return the number of samples seen so far
+        """
+        return self._count
+
+    @property
+    def time(self):
+        """
+        Return the time of the latest sample
+        """
+        return self._times[self._oldest - 1]
+
+    @property
+    def sample_interval(self):
+        """
+        Return the average spacing of the sample times in the window
+        """
+        filled = min(self._count, self.window_size)
+        if filled < 2:
+            return 0.0
+        oldest = self._oldest if self.ready else 0
+        return (self.time - self._times[oldest]) / (filled - 1)
+
+    def update(self, value, sample_time=0.0):
+        """
+        Slide the window on by one sample
+        """
+        old_value = self._values[self._oldest]
+        self._values[self._oldest] = value
+        self._times[self._oldest] = sample_time
+        self._oldest = (self._oldest + 1) % self.window_size
+        self._count += 1
+        self._top = None
+
+        self._since_resync += 1
+        if self._since_resync >= self._resync_interval:
+            self.resync()
+        else:
+            # X_k <- (X_k - oldest + newest) * exp(2 pi i k / N)
+            self._dft += value - old_value
+            self._dft *= self._twiddle
+
+    def extend(self, values, sample_times=None):
+        """
+        Slide the window on by many samples
+        A block at least a window long replaces the window outright with one exact transform
+        """
+        values = np.asarray(values, dtype=np.float64)
+        sample_times = np.zeros(len(values)) if sample_times is None else np.asarray(sample_times)
+        if len(values) >= self.window_size:
+            self._values[:] = values[-self.window_size:]
+            self._times[:] = sample_times[-self.window_size:]
+            self._oldest = 0
+            self._count += len(values)
+            self._top = None
+            self.resync()
+            return
+        for value, sample_time in zip(values.tolist(), sample_times.tolist()):
+            self.update(value, sample_time)
+
+    def resync(self):
+        """
+        Recompute the bins exactly from the window
+        """
+        window = np.roll(self._values, -self._oldest)
+        self._dft[:] = np.fft.rfft(window)[:len(self._dft)]
+        self._since_resync = 0
+
+    def window(self):
+        """
+        Return the time and signal of the window, oldest first
+        """
+        return np.roll(self._times, -self._oldest), np.roll(self._values, -self._oldest)
+
+    def spectrum(self):
+        """
+        Return the half spectrum of the window, in bin order (same as FFT.get_half_spectrum)
+        """
+        return Spectrum.from_complex(self._dft.copy(), self.window_size)
+
+    def top(self):
+        """
+        Return the num_terms biggest components of the window as a Spectrum, biggest first
+        """
+        if self._top is None:
+            self._top = self.spectrum().top(self.num_terms)
+        return self._top
+
+    def components(self):
+        """
+        Return the num_terms biggest components as (amplitude, frequency, phase) tuples
+        """
+        return self.top().to_components()
+
+
+def monitor(stream, window_size=1024, num_terms=6, report_every=None, format_string=None):
+    """
+    Feed records from a pipe, socket or file into a SlidingDFT as they arrive
+    :param stream: binary file object carrying '<iid' or '>iid' records, as .dat files hold
+    :param report_every: samples between reports (window_size if None)
+    :param format_string: '<iid' or '>iid', detected from the first records if None
+    :return: generator of (latest sample time, SlidingDFT) once every report_every samples
+             after the first whole window
+    """
+    report_every = window_size if report_every is None else report_every
+    analyzer = SlidingDFT(window_size, num_terms)
+    first_second = None
+    next_report = window_size
+    for records in read_record_stream(stream, format_string):
+        seconds = records["seconds"].astype(np.float64)
+        if first_second is None:
+            first_second = seconds[0]
+        times = (seconds - first_second) + 1.0e-9 * records["nanoseconds"].astype(np.float64)
+        values = records["signal"].astype(np.float64)
+
+        # Split the chunk at report points so every report sees exactly the samples up to it
+        start = 0
+        while start < len(values):
+            stop = min(len(values), start + next_report - analyzer.count)
+            analyzer.extend(values[start:stop], times[start:stop])
+            start = stop
+            if analyzer.count == next_report:
+                yield analyzer.time, analyzer
+                next_report += report_every
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live top Fourier components of a record stream")
+    parser.add_argument("source", nargs="?", default="-", help="file or named pipe to read, - for stdin")
+    parser.add_argument("--port", type=int, help="listen on localhost:PORT for one connection instead")
+    parser.add_argument("--window", type=int, default=1024, help="samples per window")
+    parser.add_argument("--num-terms", type=int, default=6)
+    parser.add_argument("--every", type=int, help="samples between reports (one window if not given)")
+    parser.add_argument("--format", choices=["<iid", ">iid"], help="byte order (detected if not given)")
+    args = parser.parse_args(argv)
+
+    if args.port is not None:
+        with socket.create_server(("127.0.0.1", args.port)) as server:
+            connection, _ = server.accept()
+        stream = connection.makefile("rb")
+    elif args.source == "-":
+        stream = sys.stdin.buffer
+    else:
+        stream = open(args.source, "rb")
+
+    with stream:
+        for latest_time, analyzer in monitor(stream, args.window, args.num_terms, args.every, args.format):
+            dt = analyzer.sample_interval
+            terms = "  ".join(f"{mag:.3f}@{freq / dt:.3f}" for mag, freq, _ in analyzer.components())
+            print(f"t = {latest_time:10.4f} s  {terms}", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
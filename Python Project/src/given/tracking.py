@@ -0,0 +1,115 @@
+"""
+Follow the magnitude and phase of a few known frequencies over windows or files
+
+Once get_fourier_components has found the dominant terms, later data only needs those few
+frequencies: a targeted DFT costs O(N * k) for k terms instead of a full transform.
+"""
+import numpy as np
+
+from given.metrics import metrics
+from given.readers import read_signal
+from given.spectrum import Spectrum
+
+
+def targeted_dft(windows, freq, block_elements=1 << 22):
+    """
+    DFT of each window at the given frequencies only
+    :param windows: (num_samples,) signal or (num_windows, num_samples) array of windows
+    :param freq: frequencies in radians per sample
+    :param block_elements: most window samples multiplied at once, so strided views are only
+                           copied a block at a time
+    :return: complex values, (k,) or (num_windows, k)
+    """
+    windows = np.asarray(windows)
+    freq = np.asarray(freq, dtype=np.float64).reshape(-1)
+    n = windows.shape[-1]
+
+    # One real basis of cosines and sines turns every window into a single matrix product
+    angles = np.outer(np.arange(n), freq)
+    basis = np.concatenate((np.cos(angles), np.sin(angles)), axis=1)
+
+    flat = windows.reshape(-1, n)
+    values = np.empty((len(flat), len(freq)), dtype=np.complex128)
+    block_rows = max(1, block_elements // max(1, n))
+    for start in range(0, len(flat), block_rows):
+        projected = np.ascontiguousarray(flat[start:start + block_rows]) @ basis
+        values[start:start + block_rows] = projected[:, :len(freq)] - 1j * projected[:, len(freq):]
+    return values.reshape(windows.shape[:-1] + (len(freq),))
+
+
+class FrequencyTracker:
+    """
+    Tracks the terms of a component list (from FFT.get_fourier_components or FFT.get_spectrum)
+    """
+    def __init__(self, components, sample_interval=None):
+        """
+        :param components: Spectrum or list of (amplitude, frequency, phase) tuples
+        :param sample_interval: sample period the components were found at. If given, the
+                                frequencies are followed in the time domain, so data sampled at
+                                another rate is still measured at the same frequencies in Hz
+        """
+        if isinstance(components, Spectrum):
+            freq = components.freq
+        else:
+            freq = [frequency for _, frequency, _ in components]
+        self.freq = np.array(freq, dtype=np.float64).reshape(-1)
+        self.sample_interval = sample_interval
+
+    def __len__(self):
+        """
+        Return the number of tracked frequencies
+        """
+        return len(self.freq)
+
+    def frequencies_for(self, sample_times):
+        """
+        Return the tracked frequencies in radians per sample for data sampled at sample_times
+        """
+        if self.sample_interval is None or len(sample_times) < 2:
+            return self.freq
+        dt = (sample_times[-1] - sample_times[0]) / (len(sample_times) - 1)
+        return self.freq * (dt / self.sample_interval)
+
+    def measure(self, sample_times, signal):
+        """
+        Measure the tracked frequencies over a whole signal
+        :return: Spectrum of the tracked frequencies, in the order given, phases relative to the first sample
+        """
+        return self.track(sample_times, signal, len(signal))[1][0]
+
+    def track(self, sample_times, signal, window_size=1024, hop_size=None):
+        """
+        Measure the tracked frequencies in every window of a signal
+        :param window_size: samples per window
+        :param hop_size: samples between window starts (window_size if None)
+        :return: start time of each window, and a 2D Spectrum of (windows, tracked frequencies)
+                 arrays, so column j is the magnitude and phase series of frequency j
+        """
+        hop_size = window_size if hop_size is None else hop_size
+        assert 0 < window_size <= len(signal), "Window must fit in the signal"
+        assert hop_size > 0, "Hop size must be positive"
+
+        freq = self.frequencies_for(sample_times)
+        windows = np.lib.stride_tricks.sliding_window_view(signal, window_size)[::hop_size]
+        with metrics.stage("transform", backend="targeted", samples=windows.size, terms=len(freq)):
+            values = targeted_dft(windows, freq)
+
+        starts = np.arange(len(windows)) * hop_size
+        return sample_times[starts], Spectrum.from_complex(values, window_size,
+                                                           freq * window_size / (2.0 * np.pi))
+
+    def track_file(self, file_path, window_size=1024, hop_size=None):
+        """
+        Read a .dat, .csv or .sig file and track the frequencies over its windows
+        :return: see track
+        """
+        return self.track(*read_signal(file_path), window_size, hop_size)
+
+    def track_files(self, file_paths):
+        """
+        Measure the tracked frequencies over each whole file
+        :return: 2D Spectrum of (files, tracked frequencies) arrays, in the order of file_paths
+        """
+        spectra = [self.measure(*read_signal(file_path)) for file_path in file_paths]
+        return Spectrum(*(np.stack([getattr(spectrum, name) for spectrum in spectra])
+                          for name in ("mag", "freq", "phase")))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The package lives in src/ and is run from there, as the scripts do
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
+
+
+@pytest.fixture
+def data_dir():
+    """
+    Folder of the committed .dat and .csv captures
+    """
+    return os.path.join(PROJECT_DIR, "data")
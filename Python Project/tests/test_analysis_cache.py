@@ -0,0 +1,62 @@
+"""
+Checks that the analysis cache reuses work and notices changed files
+"""
+import os
+import shutil
+
+import numpy as np
+
+from given.analysis_cache import AnalysisCache
+from given.fft import FFT
+from given.readers import read_signal
+
+
+def copy_capture(data_dir, tmp_path, file_name="noisy_signal_7.dat"):
+    """
+    Copy a committed capture somewhere the test may change it
+    """
+    file_path = str(tmp_path / file_name)
+    shutil.copy(os.path.join(data_dir, file_name), file_path)
+    return file_path
+
+
+def test_results_match_a_fresh_analysis(data_dir, tmp_path):
+    file_path = copy_capture(data_dir, tmp_path)
+    time, signal, spectrum, fourier_series = AnalysisCache().analyze(file_path, 6)
+
+    fft = FFT(*read_signal(file_path))
+    expected = fft.get_spectrum(6)
+    np.testing.assert_array_equal(spectrum.freq, expected.freq)
+    np.testing.assert_allclose(fourier_series, fft.reconstruct(expected), rtol=0, atol=1.0e-12)
+
+
+def test_stages_only_run_once(data_dir, tmp_path):
+    file_path = copy_capture(data_dir, tmp_path)
+    cache, stages = AnalysisCache(), []
+    cache.analyze(file_path, 6, stages.append)
+    cache.analyze(file_path, 6, stages.append)
+    cache.analyze(file_path, 3, stages.append)  # a new term count only needs a reconstruction
+    assert stages == ["read", "transform", "reconstruct", "reconstruct"]
+    assert cache.nbytes == cache.lookup(file_path).nbytes
+
+
+def test_changed_file_is_read_again(data_dir, tmp_path):
+    file_path = copy_capture(data_dir, tmp_path)
+    cache = AnalysisCache()
+    cache.analyze(file_path, 6)
+    shutil.copy(os.path.join(data_dir, "noisy_signal_4.dat"), file_path)  # a different length
+    assert cache.lookup(file_path) is None
+
+    time, _, _, _ = cache.analyze(file_path, 6)
+    assert len(time) == 1033
+    assert len(cache) == 1  # the old version is dropped
+
+
+def test_least_recently_used_file_is_evicted(data_dir, tmp_path):
+    paths = [copy_capture(data_dir, tmp_path, name) for name in ("noisy_signal_4.dat", "noisy_signal_7.dat")]
+    cache = AnalysisCache(max_bytes=1)  # always keeps the newest file only
+    for file_path in paths:
+        cache.analyze(file_path, 6)
+    assert len(cache) == 1
+    assert cache.lookup(paths[0]) is None
+    assert cache.lookup(paths[1]) is not None
@@ -0,0 +1,51 @@
+"""
+Checks of the .sig container format and its converters
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.container import (convert_to_container, read_container, read_container_header,
+                             read_container_index, write_container)
+from given.readers import read_binary, read_csv
+
+
+@pytest.mark.parametrize("byte_order", ["<", ">"])
+@pytest.mark.parametrize("value_type", ["d", "f"])
+def test_container_round_trip(tmp_path, byte_order, value_type):
+    signal = np.random.default_rng(1).standard_normal(1000)
+    file_path = str(tmp_path / "signal.sig")
+    write_container(file_path, signal, 1.0e-3, start_seconds=12, start_nanoseconds=250_000_000,
+                    value_type=value_type, chunk_size=256, byte_order=byte_order)
+
+    header = read_container_header(file_path)
+    assert header["byte_order"] == byte_order
+    assert header["num_samples"] == len(signal)
+
+    time, values = read_container(file_path)
+    expected = signal.astype(np.float32) if value_type == "f" else signal
+    np.testing.assert_array_equal(values, expected)
+    # Time is measured from the start second, as read_binary does
+    np.testing.assert_allclose(time, 0.25 + np.arange(len(signal)) * 1.0e-3, rtol=0, atol=1.0e-12)
+
+    time, values = read_container(file_path, 100, 200)
+    np.testing.assert_array_equal(values, expected[100:200])
+    np.testing.assert_allclose(time[0], 0.25 + 0.1, rtol=0, atol=1.0e-12)
+
+
+@pytest.mark.parametrize("file_name", ["noisy_signal_4.dat", "noisy_signal_4.csv"])
+def test_converted_container_matches_source(data_dir, tmp_path, file_name):
+    source_path = os.path.join(data_dir, file_name)
+    file_path = convert_to_container(source_path, str(tmp_path / "signal.sig"), chunk_size=100)
+    time, signal = read_binary(source_path) if file_name.endswith(".dat") else read_csv(source_path)
+
+    converted_time, converted_signal = read_container(file_path)
+    np.testing.assert_array_equal(converted_signal, signal)
+    # The container keeps the average sample interval, the timestamps only to within their jitter
+    np.testing.assert_allclose(converted_time, time, rtol=0, atol=1.0e-6)
+
+    index = read_container_index(file_path)
+    assert len(index) == -(-len(signal) // 100)
+    np.testing.assert_array_equal(index["max"], [signal[start:start + 100].max()
+                                                 for start in range(0, len(signal), 100)])
@@ -0,0 +1,32 @@
+"""
+Checks of the min/max decimation used to draw long signals
+"""
+import numpy as np
+
+from given.decimate import min_max_decimate
+
+
+def test_keeps_every_slice_extreme_in_order():
+    rng = np.random.default_rng(0)
+    time = np.arange(10_007) * 1.0e-3
+    signal = rng.standard_normal(len(time))
+    decimated_time, decimated_signal = min_max_decimate(time, signal, 100)
+
+    assert len(decimated_time) <= 2 * 101
+    assert np.all(np.diff(decimated_time) > 0)
+    per_bin = len(time) // 100
+    slices = [signal[start:start + per_bin] for start in range(0, 100 * per_bin, per_bin)] + [signal[100 * per_bin:]]
+    assert set(decimated_signal) == {value for values in slices for value in (values.min(), values.max())}
+
+
+def test_short_signal_is_unchanged():
+    time = np.arange(150.0)
+    decimated_time, decimated_signal = min_max_decimate(time, -time, 100)
+    np.testing.assert_array_equal(decimated_time, time)
+    np.testing.assert_array_equal(decimated_signal, -time)
+
+
+def test_visible_range_keeps_a_sample_either_side():
+    time = np.arange(1000.0)
+    decimated_time, _ = min_max_decimate(time, np.sin(time), 10_000, start_time=100.5, end_time=200.5)
+    np.testing.assert_array_equal(decimated_time, np.arange(100.0, 202.0))
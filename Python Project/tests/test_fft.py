@@ -0,0 +1,98 @@
+"""
+Checks of the FFT backends against numpy_fft
+"""
+import numpy as np
+import pytest
+
+from given.fft import FFT
+
+
+def make_fft(num_samples, seed=0):
+    """
+    FFT of a few cosines plus noise, sampled every millisecond
+    """
+    rng = np.random.default_rng(seed)
+    sample_times = np.arange(num_samples) * 1.0e-3
+    signal = 2.0 * np.cos(2.0 * np.pi * 5.0 * sample_times + 0.3) \
+        + 0.5 * np.cos(2.0 * np.pi * 37.0 * sample_times - 1.1) + 0.1 * rng.standard_normal(num_samples)
+    return FFT(sample_times, signal)
+
+
+@pytest.mark.parametrize("num_samples", [2, 64, 1024])
+@pytest.mark.parametrize("backend", ["iterative", "cooley_turkey"])
+def test_radix2_backends_match_numpy(backend, num_samples):
+    mag_error, phase_error = make_fft(num_samples).check_backend(backend, num_samples)
+    assert mag_error < 1.0e-9
+    assert phase_error < 1.0e-6
+
+
+def test_radix2_backends_default_to_largest_power_of_2():
+    spectrum = make_fft(1033).get_half_spectrum("iterative")
+    assert len(spectrum) == 512
+
+
+@pytest.mark.parametrize("backend, num_samples", [("bluestein", 63), ("bluestein", 255), ("bluestein", 1033),
+                                                  ("bluestein", 1024), ("simple", 63), ("simple", 255)])
+def test_arbitrary_length_backends_match_numpy(backend, num_samples):
+    mag_error, phase_error = make_fft(num_samples).check_backend(backend, num_samples)
+    assert mag_error < 1.0e-9
+    assert phase_error < 1.0e-6
+
+
+def test_arbitrary_length_backends_default_to_whole_signal():
+    fft = make_fft(257)
+    for backend in FFT.ARBITRARY_LENGTH:
+        assert len(fft.get_half_spectrum(backend)) == 129
+
+
+def test_chirp_cache_is_bounded():
+    for num_samples in range(100, 100 + 2 * FFT.CACHED_SIZES):
+        make_fft(num_samples).bluestein_fft(num_samples)
+    assert FFT._FFT__chirp.cache_info().currsize <= FFT.CACHED_SIZES
+
+
+@pytest.mark.parametrize("num_samples", [63, 256])
+def test_naive_dft_matches_numpy_in_small_blocks(num_samples):
+    fft = make_fft(num_samples)
+    expected, _ = fft.numpy_fft(num_samples, as_spectrum=True)
+    # A handful of DFT matrix rows at a time, so the blocks don't divide the bins evenly
+    actual, _ = fft.naive_dft(num_samples, as_spectrum=True, block_elements=7 * num_samples)
+    np.testing.assert_allclose(actual.mag, expected.mag, rtol=0, atol=1.0e-9)
+
+    bins = np.array([5, 0, num_samples - 1])
+    selected, _ = fft.naive_dft(num_samples, as_spectrum=True, bins=bins)
+    np.testing.assert_allclose(selected.mag, expected.mag[bins], rtol=0, atol=1.0e-9)
+
+
+@pytest.mark.parametrize("num_samples", [64, 256, 63, 255])
+@pytest.mark.parametrize("backend", list(FFT.BACKENDS))
+def test_real_mode_matches_numpy(backend, num_samples):
+    if backend not in FFT.ARBITRARY_LENGTH and num_samples & (num_samples - 1):
+        pytest.skip("power of 2 only backend")
+    mag_error, phase_error = make_fft(num_samples).check_backend(backend, num_samples, real=True)
+    assert mag_error < 1.0e-9
+    assert phase_error < 1.0e-6
+
+
+@pytest.mark.parametrize("num_samples", [64, 63])
+@pytest.mark.parametrize("backend", ["iterative", "bluestein", "naive"])
+def test_real_mode_is_first_half_of_full_transform(backend, num_samples):
+    if backend == "iterative" and num_samples % 2:
+        pytest.skip("power of 2 only backend")
+    fft = make_fft(num_samples)
+    full, _ = getattr(fft, FFT.BACKENDS[backend])(num_samples, as_spectrum=True)
+    half, _ = getattr(fft, FFT.BACKENDS[backend])(num_samples, as_spectrum=True, real=True)
+    assert len(half) == num_samples // 2 + 1
+    np.testing.assert_allclose(half.mag, full.mag[:len(half)], rtol=0, atol=1.0e-9)
+
+
+@pytest.mark.parametrize("real", [False, True])
+@pytest.mark.parametrize("num_samples", [1024, 1033, 2066, 1043])
+def test_parallel_fft_on_threads_matches_numpy(monkeypatch, num_samples, real):
+    # 1033 is prime (and 2066 packs to it), so too few columns for 3 workers: Bluestein runs instead
+    monkeypatch.setattr(FFT, "PARALLEL_MIN_SAMPLES", 0)
+    fft = make_fft(num_samples)
+    fft.parallel_workers = 3
+    mag_error, phase_error = fft.check_backend("parallel", num_samples, real)
+    assert mag_error < 1.0e-9
+    assert phase_error < 1.0e-6
@@ -0,0 +1,36 @@
+"""
+Checks of the single precision path against double precision
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.fft import FFT
+from given.readers import read_signal
+
+
+@pytest.mark.parametrize("file_name", ["noisy_signal_4.dat", "noisy_signal_4.csv"])
+def test_readers_keep_time_in_float64(data_dir, file_name):
+    time, signal = read_signal(os.path.join(data_dir, file_name), np.float32)
+    assert time.dtype == np.float64
+    assert signal.dtype == np.float32
+
+
+@pytest.mark.parametrize("backend", ["numpy", "iterative"])
+def test_float32_matches_float64(data_dir, backend):
+    # noisy_signal_4 is 1033 samples, so the power of 2 backend gives terms off the bins
+    # of the whole signal and reconstruct sums them from the sample times
+    file_path = os.path.join(data_dir, "noisy_signal_4.dat")
+    fft64, fft32 = FFT(*read_signal(file_path)), FFT(*read_signal(file_path, np.float32))
+    spectrum64, spectrum32 = fft64.get_spectrum(6, backend), fft32.get_spectrum(6, backend)
+    largest = spectrum64.mag.max()
+
+    # Only the numpy, parallel and naive backends transform in single precision
+    assert spectrum32.mag.dtype == (np.float32 if backend == "numpy" else np.float64)
+    np.testing.assert_array_equal(spectrum32.freq, spectrum64.freq)
+    np.testing.assert_allclose(spectrum32.mag, spectrum64.mag, rtol=0, atol=1.0e-6 * largest)
+
+    series = fft32.reconstruct(spectrum32)
+    assert series.dtype == np.float32
+    np.testing.assert_allclose(series, fft64.reconstruct(spectrum64), rtol=0, atol=2.0e-6 * largest)
@@ -0,0 +1,36 @@
+"""
+Checks that growing or shrinking an IncrementalSeries matches a fresh reconstruction
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.fft import FFT
+from given.incremental_series import IncrementalSeries
+from given.readers import read_signal
+
+
+@pytest.fixture
+def fft(data_dir):
+    return FFT(*read_signal(os.path.join(data_dir, "noisy_signal_7.dat")))
+
+
+@pytest.mark.parametrize("method", ["auto", "blocked"])
+def test_set_terms_matches_fresh_series(fft, method):
+    half_spectrum = fft.get_half_spectrum()
+    series = IncrementalSeries(fft, half_spectrum, 6, method=method)
+    for num_terms in (9, 3, 64, 1, 63, 0, 5):
+        expected = fft.reconstruct(half_spectrum.top(num_terms), method=method) if num_terms \
+            else np.zeros(len(fft))
+        np.testing.assert_allclose(series.set_terms(num_terms), expected, rtol=0, atol=1.0e-9)
+        assert series.num_terms == num_terms
+
+
+def test_series_with_more_terms_than_kept_is_rebuilt(fft):
+    # A series made from more terms than max_terms can't be stepped from, so it is summed afresh
+    half_spectrum = fft.get_half_spectrum()
+    series = IncrementalSeries(fft, half_spectrum, 100, fft.reconstruct(half_spectrum.top(100)), max_terms=64)
+    assert series.num_terms == 64
+    series.set_terms(63)
+    np.testing.assert_allclose(series.fourier_series, fft.reconstruct(half_spectrum.top(63)), rtol=0, atol=1.0e-9)
@@ -0,0 +1,50 @@
+"""
+Checks that the batched multi-channel FFT matches FFT channel by channel
+"""
+import numpy as np
+import pytest
+
+from given.fft import FFT
+from given.multichannel import MultiChannelFFT
+
+
+def make_channels(num_channels=4, num_samples=1033, seed=0):
+    """
+    Time and (channels, samples) signals of a different cosine plus noise per channel
+    """
+    rng = np.random.default_rng(seed)
+    time = np.arange(num_samples) * 1.0e-3
+    signals = np.stack([np.cos(2.0 * np.pi * (5.0 + 3.0 * channel) * time + 0.2 * channel)
+                        for channel in range(num_channels)]) + 0.1 * rng.standard_normal((num_channels, num_samples))
+    return time, signals
+
+
+@pytest.mark.parametrize("num_samples", [1024, 1033])
+def test_channels_match_fft(num_samples):
+    time, signals = make_channels(num_samples=num_samples)
+    spectrum = MultiChannelFFT(time, signals).get_spectrum(5)
+    assert spectrum.mag.shape == (4, 5)
+    for channel, signal in enumerate(signals):
+        expected = FFT(time, signal).get_spectrum(5)
+        np.testing.assert_array_equal(spectrum[channel].freq, expected.freq)
+        np.testing.assert_allclose(spectrum[channel].mag, expected.mag, rtol=0, atol=1.0e-12)
+        np.testing.assert_allclose(spectrum[channel].phase, expected.phase, rtol=0, atol=1.0e-9)
+
+
+def test_reconstruct_matches_fft():
+    time, signals = make_channels()
+    multichannel = MultiChannelFFT(time, signals)
+    series = multichannel.reconstruct(multichannel.get_spectrum(5))
+    for channel, signal in enumerate(signals):
+        fft = FFT(time, signal)
+        np.testing.assert_allclose(series[channel], fft.reconstruct(fft.get_spectrum(5)), rtol=0, atol=1.0e-9)
+
+
+def test_off_bin_terms_are_summed_per_channel():
+    time, signals = make_channels()
+    multichannel = MultiChannelFFT(time, signals)
+    spectrum = multichannel.get_spectrum(5, num_samples=1000)  # bins of 1000 samples, not of 1033
+    series = multichannel.reconstruct(spectrum)
+    for channel in range(len(signals)):
+        expected = multichannel.channel(channel).reconstruct(spectrum[channel], method="blocked")
+        np.testing.assert_allclose(series[channel], expected, rtol=0, atol=1.0e-12)
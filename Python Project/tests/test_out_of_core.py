@@ -0,0 +1,35 @@
+"""
+Checks that the out-of-core FFT finds the same components as FFT
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.fft import FFT
+from given.out_of_core import OutOfCoreFFT
+from given.readers import read_binary
+
+
+@pytest.mark.parametrize("memory_bytes", [256 * 1024**2, 64 * 80])
+@pytest.mark.parametrize("file_name", ["noisy_signal_7.dat", "noisy_signal_4.dat", "noisy_signal_5.dat"])
+def test_matches_fft(data_dir, file_name, memory_bytes):
+    # 1024 samples split 32 x 32, 1033 is prime and 1043 is 7 x 149: with only 80 elements of
+    # budget the last two go through Bluestein
+    file_path = os.path.join(data_dir, file_name)
+    expected = FFT(*read_binary(file_path)).get_spectrum(7)
+    spectrum = OutOfCoreFFT(file_path, memory_bytes=memory_bytes).get_spectrum(7)
+
+    np.testing.assert_array_equal(spectrum.freq, expected.freq)
+    np.testing.assert_allclose(spectrum.mag, expected.mag, rtol=0, atol=1.0e-12)
+    np.testing.assert_allclose(np.angle(np.exp(1j * (spectrum.phase - expected.phase))), 0.0, atol=1.0e-9)
+
+
+def test_part_of_the_file(data_dir):
+    file_path = os.path.join(data_dir, "noisy_signal_4.dat")
+    time, signal = read_binary(file_path)
+    expected = FFT(time, signal).get_spectrum(5, num_samples=1000)
+    spectrum = OutOfCoreFFT(file_path, memory_bytes=64 * 64).get_spectrum(5, 1000)
+    np.testing.assert_array_equal(spectrum.freq, expected.freq)
+    np.testing.assert_allclose(spectrum.mag, expected.mag, rtol=0, atol=1.0e-12)
+    assert OutOfCoreFFT(file_path).sample_interval == pytest.approx(time[1] - time[0])
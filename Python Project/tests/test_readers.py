@@ -0,0 +1,77 @@
+"""
+Checks of the .dat and .csv readers
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.readers import (BINARY_FORMATS, detect_binary_format, read_binary, read_binary_records, read_csv,
+                           read_signal)
+
+
+def write_records(file_path, format_string, num_records=300, start_second=1649539401):
+    """
+    Write a .dat file of a sine sampled every 10 ms, as signal_data.write_data_as_binary does
+    :return: the times relative to start_second and the signal written
+    """
+    time = 0.25 + np.arange(num_records) * 0.01
+    records = np.zeros(num_records, dtype=BINARY_FORMATS[format_string])
+    records["seconds"] = start_second + np.floor(time)
+    records["nanoseconds"] = np.round((time % 1.0) * 1.0e9)
+    records["signal"] = np.sin(time)
+    records.tofile(file_path)
+    return time, records["signal"].astype(np.float64)
+
+
+@pytest.mark.parametrize("format_string", ["<iid", ">iid"])
+def test_read_binary_both_byte_orders(tmp_path, format_string):
+    file_path = str(tmp_path / "signal.dat")
+    expected_time, expected_signal = write_records(file_path, format_string)
+    assert detect_binary_format(file_path) == format_string
+
+    time, signal = read_binary(file_path)
+    np.testing.assert_array_equal(signal, expected_signal)
+    np.testing.assert_allclose(time, expected_time, rtol=0, atol=1.0e-9)
+
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    file_path = str(tmp_path / "signal.dat")
+    write_records(file_path, "<iid", 100)
+    with open(file_path, "ab") as fout:
+        fout.write(b"\x00" * 7)
+    assert len(read_binary_records(file_path)) == 100
+
+
+def test_committed_files_detected(data_dir):
+    for file_name in sorted(os.listdir(data_dir)):
+        if file_name.endswith(".dat"):
+            records = read_binary_records(os.path.join(data_dir, file_name))
+            assert np.all(np.diff(records["seconds"].astype(np.int64)) >= 0), file_name
+            assert np.all((records["nanoseconds"] >= 0) & (records["nanoseconds"] < 1_000_000_000)), file_name
+
+
+@pytest.mark.parametrize("chunk_bytes", [1 << 24, 100, 37])
+def test_read_csv_in_chunks(data_dir, chunk_bytes):
+    # Small chunks cut lines in two, which must be carried into the next chunk
+    file_path = os.path.join(data_dir, "noisy_signal_4.csv")
+    rows = np.loadtxt(file_path, delimiter=",", ndmin=2)
+    time, signal = read_csv(file_path, chunk_bytes)
+    np.testing.assert_array_equal(signal, rows[:, 2])
+    np.testing.assert_allclose(time, (rows[:, 0] - rows[0, 0]) + 1.0e-9 * rows[:, 1], rtol=0, atol=1.0e-12)
+
+
+def test_read_csv_without_final_newline(tmp_path):
+    file_path = str(tmp_path / "signal.csv")
+    with open(file_path, "w") as fout:
+        fout.write("10,0,1.5\n10,500000000,2.5\n11,0,3.5")
+    time, signal = read_csv(file_path, chunk_bytes=8)
+    np.testing.assert_array_equal(time, [0.0, 0.5, 1.0])
+    np.testing.assert_array_equal(signal, [1.5, 2.5, 3.5])
+
+
+def test_csv_and_dat_files_agree(data_dir):
+    dat_time, dat_signal = read_signal(os.path.join(data_dir, "noisy_signal_4.dat"))
+    csv_time, csv_signal = read_signal(os.path.join(data_dir, "noisy_signal_4.csv"))
+    np.testing.assert_allclose(csv_signal, dat_signal, rtol=1.0e-12, atol=0)
+    np.testing.assert_allclose(csv_time, dat_time, rtol=0, atol=1.0e-9)
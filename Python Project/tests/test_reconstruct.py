@@ -0,0 +1,56 @@
+"""
+Checks that the reconstruction methods agree with each other and with a direct sum
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given.fft import FFT
+from given.readers import read_signal
+
+
+def make_fft(num_samples, start_time=0.0, seed=0):
+    """
+    FFT of a few cosines plus noise, sampled every millisecond
+    """
+    rng = np.random.default_rng(seed)
+    sample_times = start_time + np.arange(num_samples) * 1.0e-3
+    signal = 2.0 * np.cos(2.0 * np.pi * 5.0 * sample_times + 0.3) \
+        + 0.5 * np.cos(2.0 * np.pi * 37.0 * sample_times - 1.1) + 0.1 * rng.standard_normal(num_samples)
+    return FFT(sample_times, signal)
+
+
+@pytest.mark.parametrize("num_samples", [1024, 1033])
+def test_reconstruct_methods_agree(num_samples):
+    fft = make_fft(num_samples)
+    spectrum = fft.get_spectrum(6)
+    auto = fft.reconstruct(spectrum, method="auto")
+    blocked = fft.reconstruct(spectrum, method="blocked", block_elements=100)
+    np.testing.assert_allclose(auto, blocked, rtol=0, atol=1.0e-9)
+    np.testing.assert_allclose(fft.reconstruct(spectrum.to_components()), auto, rtol=0, atol=1.0e-9)
+
+
+def test_reconstruct_is_the_series_sum():
+    fft = make_fft(1033)
+    spectrum = fft.get_spectrum(3)
+    time = np.arange(1033) * 1.0e-3
+    expected = sum(mag * np.cos(freq / 1.0e-3 * time + phase) for mag, freq, phase in spectrum.to_components())
+    np.testing.assert_allclose(fft.reconstruct(spectrum), expected, rtol=0, atol=1.0e-9)
+
+
+def test_reconstruct_shifted_times():
+    # Phases are measured from the first sample, wherever the recording starts
+    shifted = make_fft(1024, start_time=0.37)
+    spectrum = shifted.get_spectrum(6)
+    np.testing.assert_allclose(shifted.reconstruct(spectrum, method="blocked"),
+                               shifted.reconstruct(spectrum, method="auto"), rtol=0, atol=1.0e-9)
+
+
+def test_reconstruct_off_bin_terms(data_dir):
+    # A power of 2 backend on a 1033 sample file gives terms off the bins, so "auto" sums them
+    fft = FFT(*read_signal(os.path.join(data_dir, "noisy_signal_4.dat")))
+    spectrum = fft.get_spectrum(6, backend="iterative")
+    with pytest.raises(AssertionError):
+        fft.reconstruct(spectrum, method="ifft")
+    np.testing.assert_array_equal(fft.reconstruct(spectrum), fft.reconstruct(spectrum, method="blocked"))
@@ -0,0 +1,37 @@
+"""
+Checks that generated datasets read back as written
+"""
+import os
+
+import numpy as np
+import pytest
+
+from given import signal_data
+from given.readers import read_signal
+
+
+def test_csv_written_in_chunks_reads_back(tmp_path):
+    sample_times = np.linspace(0.0, 3.0, 1001)
+    clean, noisy = np.sin(sample_times), np.cos(sample_times)
+    assert signal_data.write_data_as_csv(sample_times, clean, noisy, 0, str(tmp_path), chunk_size=97)
+    for kind, signal in (("clean", clean), ("noisy", noisy)):
+        time, values = read_signal(str(tmp_path / f"{kind}_signal_0.csv"))
+        np.testing.assert_array_equal(values, signal)  # repr round trips exactly
+        np.testing.assert_allclose(time, sample_times, rtol=0, atol=2.0e-9)  # nanoseconds truncate
+
+
+@pytest.mark.parametrize("file_format", ["dat", "csv"])
+def test_write_dataset_is_independent_of_chunk_size(tmp_path, file_format):
+    amp, freq, phase = [[1.0, 0.5], [2.0, 0.25]], [[3.0, 9.0], [5.0, 15.0]], [[0.0, 1.0], [0.5, 0.0]]
+    signals = []
+    for chunk_size in (1000, 77):
+        folder_name = str(tmp_path / str(chunk_size))
+        os.mkdir(folder_name)
+        paths = signal_data.write_dataset(amp, freq, phase, 10.0, 1000, noise_level=0.1, seed=3,
+                                          folder_name=folder_name, file_format=file_format,
+                                          chunk_size=chunk_size)
+        assert len(paths) == 4
+        signals.append([read_signal(path)[1] for path in paths])
+    for first, second in zip(*signals):
+        assert len(first) == 1000
+        np.testing.assert_array_equal(first, second)
@@ -0,0 +1,61 @@
+"""
+Checks of the sliding DFT and of record streams that arrive a little at a time
+"""
+import io
+import os
+
+import numpy as np
+import pytest
+
+from given.readers import read_binary_records, read_record_stream
+from given.streaming import SlidingDFT, monitor
+
+
+class TrickleStream(io.RawIOBase):
+    """
+    Binary stream that hands out at most chunk_bytes per read, like a slow pipe or socket
+    """
+    def __init__(self, data, chunk_bytes):
+        self.data = data
+        self.chunk_bytes = chunk_bytes
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def read1(self, size=-1):
+        size = self.chunk_bytes if size < 0 else min(size, self.chunk_bytes)
+        block = self.data[self.position:self.position + size]
+        self.position += len(block)
+        return block
+
+    read = read1
+
+
+def test_sliding_dft_matches_rfft():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(300)
+    analyzer = SlidingDFT(window_size=64, num_terms=4, resync_interval=1000)
+    for value in values:
+        analyzer.update(value)
+    expected = np.fft.rfft(values[-64:])[:32]
+    spectrum = analyzer.spectrum()
+    np.testing.assert_allclose(spectrum.mag, np.abs(expected) * 2.0 / 64, rtol=0, atol=1.0e-9)
+    assert analyzer.top().mag[0] == pytest.approx(spectrum.mag.max())
+
+
+@pytest.mark.parametrize("file_name", ["noisy_signal_1.dat", "clean_signal_3.dat", "noisy_signal_7.dat"])
+def test_record_at_a_time_stream(data_dir, file_name):
+    # One record per read used to be enough to guess the byte order, wrongly for some files
+    file_path = os.path.join(data_dir, file_name)
+    with open(file_path, "rb") as fin:
+        data = fin.read()
+    records = np.concatenate(list(read_record_stream(TrickleStream(data, 16))))
+    np.testing.assert_array_equal(records["signal"], read_binary_records(file_path)["signal"])
+
+    trickled = list((time, analyzer.components()) for time, analyzer in monitor(TrickleStream(data, 16), 256))
+    whole = list((time, analyzer.components()) for time, analyzer in monitor(io.BytesIO(data), 256))
+    assert len(trickled) == len(whole) > 0
+    for (time, components), (expected_time, expected) in zip(trickled, whole):
+        assert time == expected_time
+        np.testing.assert_allclose(np.array(components), np.array(expected), rtol=0, atol=1.0e-9)
@@ -0,0 +1,42 @@
+"""
+Checks of the targeted DFT and frequency tracking
+"""
+import os
+
+import numpy as np
+
+from given.fft import FFT
+from given.readers import read_signal
+from given.tracking import FrequencyTracker, targeted_dft
+
+
+def test_targeted_dft_matches_rfft_bins():
+    rng = np.random.default_rng(0)
+    windows = rng.standard_normal((5, 128))
+    bins = np.array([3, 0, 17, 64])
+    values = targeted_dft(windows, 2.0 * np.pi * bins / 128, block_elements=300)
+    np.testing.assert_allclose(values, np.fft.rfft(windows, axis=-1)[:, bins], rtol=0, atol=1.0e-9)
+
+
+def test_measure_matches_the_spectrum_it_came_from(data_dir):
+    time, signal = read_signal(os.path.join(data_dir, "noisy_signal_4.dat"))
+    spectrum = FFT(time, signal).get_spectrum(4)
+    measured = FrequencyTracker(spectrum).measure(time, signal)
+    np.testing.assert_allclose(measured.mag, spectrum.mag, rtol=0, atol=1.0e-12)
+    np.testing.assert_allclose(measured.phase, spectrum.phase, rtol=0, atol=1.0e-9)
+
+
+def test_track_follows_a_changing_amplitude():
+    time = np.arange(4096) * 1.0e-3
+    amplitude = np.repeat([1.0, 2.0, 3.0, 4.0], 1024)
+    signal = amplitude * np.cos(2.0 * np.pi * 125.0 * time)
+    tracker = FrequencyTracker([(1.0, 2.0 * np.pi * 125.0e-3, 0.0)])
+    starts, tracked = tracker.track(time, signal, window_size=1024)
+    np.testing.assert_array_equal(starts, time[::1024])
+    np.testing.assert_allclose(tracked.mag[:, 0], [1.0, 2.0, 3.0, 4.0], rtol=0, atol=1.0e-9)
+
+
+def test_frequencies_follow_the_sample_rate():
+    # Found at 1 kHz, measured on data sampled at 2 kHz: the same Hz is half the radians per sample
+    tracker = FrequencyTracker([(1.0, 0.5, 0.0)], sample_interval=1.0e-3)
+    np.testing.assert_allclose(tracker.frequencies_for(np.arange(10) * 0.5e-3), [0.25])